@@ -0,0 +1,231 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_update_data, mutate_update_data
+from helpers.csr import NUMPY_AVAILABLE, CSRGraph
+from helpers.graph import ChainGraph
+from helpers.mapdata import extract_maps, fingerprint_map, parse_update_data
+from helpers.pathfinder import print_graph
+from helpers.state import StateStore
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+HOME_SYSTEM_NAME = "J103453"
+
+# A stage is a regression once its median is this much slower than the baseline
+DEFAULT_TOLERANCE = 0.25
+
+
+def is_highsec(system_id, name):
+    return name.startswith("HS-")
+
+
+def extract(data):
+    records = extract_maps(data)
+    systems = [system for record in records for system in record.systems]
+    connections = {edge.key for record in records for edge in record.connections}
+    return systems, connections
+
+
+def build_chain(systems, connections):
+    chain = ChainGraph(HOME_SYSTEM_NAME, is_highsec)
+    chain.update_systems(systems)
+    chain.apply_changes(connections, set())
+    return chain
+
+
+def time_stage(run, setup=None, repeat=5):
+    """Median and min wall time of run(setup()) in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        run(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 4), "min_ms": round(min(samples), 4)}
+
+
+def run_benchmarks(systems=2000, maps=3, changes=20, repeat=9, seed=42):
+    data = generate_update_data(systems, maps, seed)
+    mutated = mutate_update_data(data, changes, seed + 1)
+    payload = json.dumps(data)
+
+    base_systems, base_connections = extract(data)
+    new_systems, new_connections = extract(mutated)
+    added = new_connections - base_connections
+    removed = base_connections - new_connections
+    chain = build_chain(base_systems, base_connections)
+    records = extract_maps(data)
+    chain.update_edges(edge for record in records for edge in record.connections)
+    devnull = open(os.devnull, "w")
+    tmp_dir = tempfile.mkdtemp(prefix="wormwarden-bench-")
+    stores = []
+
+    def fresh_store():
+        store = StateStore(os.path.join(tmp_dir, f"state-{len(stores)}.sqlite3"))
+        store.commit_cycle(base_connections, (), base_systems)
+        stores.append(store)
+        return (store,)
+
+    def dirty_chain():
+        chain.dirty = True
+        return ()
+
+    def dirty_exits():
+        chain.exits_dirty = True
+        return ()
+
+    def cold_views():
+        chain.views = {}
+        chain.ship_routes = {}
+        return ()
+
+    def quiet(fn):
+        def run(*args):
+            with contextlib.redirect_stdout(devnull):
+                fn(*args)
+        return run
+
+    def fresh_csr():
+        return (CSRGraph(chain.connections, chain.name_lookup),)
+
+    # The link-level delta apply_changes would hand the CSR copy
+    links = {tuple(sorted(connection)) for connection in chain.connections}
+    unlinked = list({tuple(sorted(connection)) for connection in removed} & links)
+    linked = list({tuple(sorted(connection)) for connection in added} - links)
+
+    def patch_csr(csr):
+        csr.remove_links(unlinked)
+        csr.add_links(linked)
+
+    def at_debug(fn):
+        # print_graph is a no-op below DEBUG; time the formatting and write it does when enabled
+        pathfinder_logger = logging.getLogger("helpers.pathfinder")
+        handler = logging.StreamHandler(devnull)
+
+        def run(*args):
+            level, propagate = pathfinder_logger.level, pathfinder_logger.propagate
+            pathfinder_logger.addHandler(handler)
+            pathfinder_logger.setLevel(logging.DEBUG)
+            pathfinder_logger.propagate = False
+            try:
+                fn(*args)
+            finally:
+                pathfinder_logger.removeHandler(handler)
+                pathfinder_logger.setLevel(level)
+                pathfinder_logger.propagate = propagate
+        return run
+
+    stages = {
+        "json_decode": time_stage(lambda: json.loads(payload), repeat=repeat),
+        "extract": time_stage(lambda: extract(data), repeat=repeat),
+        "parse_update_data": time_stage(lambda: parse_update_data(payload), repeat=repeat),
+        "fingerprint": time_stage(
+            lambda: [fingerprint_map(r.systems, r.connections) for r in records], repeat=repeat
+        ),
+        "graph_build": time_stage(lambda: build_chain(base_systems, base_connections), repeat=repeat),
+        "print_graph": time_stage(at_debug(lambda: print_graph(chain.adjacency, chain.name_lookup)), repeat=repeat),
+        "csr_build": time_stage(lambda: CSRGraph(chain.connections, chain.name_lookup), repeat=repeat)
+        if NUMPY_AVAILABLE
+        else None,
+        # The chain only switches to CSR at VECTORIZE_MIN_NODES; these time that path at any size
+        "csr_patch": time_stage(patch_csr, setup=fresh_csr, repeat=repeat) if NUMPY_AVAILABLE else None,
+        "csr_bfs": time_stage(
+            lambda csr: csr.bfs(csr.indices([chain.home_id]), vectorized=True), setup=fresh_csr, repeat=repeat
+        )
+        if NUMPY_AVAILABLE
+        else None,
+        "find_path_to_highsec": time_stage(
+            quiet(lambda: chain.find_path_to_highsec()), setup=dirty_chain, repeat=repeat
+        ),
+        "exit_field": time_stage(lambda: chain.exit_distance(chain.home_id), setup=dirty_exits, repeat=repeat),
+        "ship_route_search": time_stage(
+            lambda: [chain.find_ship_route(c) for c in ("frigate", "battleship", "capital")],
+            setup=cold_views,
+            repeat=repeat,
+        ),
+        "connection_diff": time_stage(
+            lambda: (new_connections - base_connections, base_connections - new_connections),
+            repeat=repeat,
+        ),
+        "state_save": time_stage(
+            lambda store: store.commit_cycle(added, removed, new_systems), setup=fresh_store, repeat=repeat
+        ),
+    }
+    stages = {stage: timing for stage, timing in stages.items() if timing is not None}
+    devnull.close()
+    for store in stores:
+        store.close()
+    shutil.rmtree(tmp_dir)
+
+    return {
+        "params": {"systems": systems, "maps": maps, "changes": changes, "repeat": repeat, "seed": seed},
+        "payload_bytes": len(payload),
+        "connections": len(base_connections),
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+        },
+        "stages": stages,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return the stages whose median regressed beyond tolerance"""
+    regressions = []
+    for stage, timing in results["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or before["median_ms"] <= 0:
+            continue
+        ratio = timing["median_ms"] / before["median_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append((stage, before["median_ms"], timing["median_ms"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the polling cycle on a synthetic chain")
+    parser.add_argument("--systems", type=int, default=2000)
+    parser.add_argument("--maps", type=int, default=3)
+    parser.add_argument("--changes", type=int, default=20, help="connections changed between the two polls")
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", metavar="PATH", nargs="?", const=BASELINE_FILE, help="write results as the new baseline")
+    parser.add_argument("--compare", metavar="PATH", nargs="?", const=BASELINE_FILE, help="fail if slower than this baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.systems, args.maps, args.changes, args.repeat, args.seed)
+    print(f"📊 {args.systems} systems, {results['connections']} connections, {results['payload_bytes']} byte payload")
+    for stage, timing in results["stages"].items():
+        print(f"  {stage:<22} {timing['median_ms']:>10.3f} ms (min {timing['min_ms']:.3f})")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("params") != results["params"]:
+            print("⚠️ Baseline was recorded with different parameters; comparison may be meaningless")
+        regressions = compare(results, baseline, args.tolerance)
+        for stage, before, after, ratio in regressions:
+            print(f"❌ {stage}: {before:.3f} ms → {after:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Local stand-in for Pathfinder, ESI and a Discord webhook
+
+Serves a synthetic chain so the bot, PathfinderClient and the polling
+loop can be load tested with no network:
+
+    python3 -m benchmarks.standin --port 8900 --latency 0.2 --error-rate 0.05
+
+then point the bot at it:
+
+    PATHFINDER_URL=http://127.0.0.1:8900
+    ESI_BASE_URL=http://127.0.0.1:8900/latest
+    DISCORD_WEBHOOK=http://127.0.0.1:8900/webhook
+    PF_SESSION=standin PF_CHAR_COOKIE=standin
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+from benchmarks.synthetic import generate_update_data, mutate_update_data
+from helpers.log import setup_logging
+
+logger = logging.getLogger("standin")
+
+# Fault settings that can be changed while running with POST /control
+FAULT_SETTINGS = ("latency", "jitter", "error_rate", "throttle_rate", "retry_after", "mutations", "mutate_probability")
+
+
+class StandIn:
+    """The fake services and their fault injection
+
+    Every request waits latency plus up to jitter seconds, then fails with
+    a 500 at error_rate or a 429 with Retry-After at throttle_rate. Each
+    updateData poll mutates the map with probability mutate_probability,
+    adding and removing `mutations` connections; other polls return the
+    same bytes as the last one.
+    """
+
+    def __init__(
+        self,
+        systems: int = 2000,
+        maps: int = 3,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        mutations: int = 4,
+        mutate_probability: float = 0.2,
+        seed: int = 42,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.mutations = mutations
+        self.mutate_probability = mutate_probability
+        self.rng = random.Random(seed)
+
+        self.data = generate_update_data(systems, maps, seed)
+        self.payload = json.dumps(self.data).encode("utf-8")
+        self.version = 0
+        self.system_ids = {
+            s["name"]: s["systemId"] for entry in self.data["mapData"] for s in entry["data"]["systems"]
+        }
+        self.stats: Counter = Counter()
+
+        self.app = web.Application(middlewares=[self.inject_faults])
+        self.app.router.add_post("/api/Map/updateData", self.update_data)
+        self.app.router.add_post("/latest/universe/ids/", self.universe_ids)
+        self.app.router.add_get("/latest/route/{origin}/{destination}/", self.route)
+        self.app.router.add_post("/webhook", self.webhook)
+        self.app.router.add_get("/stats", self.get_stats)
+        self.app.router.add_post("/control", self.control)
+
+    @web.middleware
+    async def inject_faults(self, request: web.Request, handler):
+        name = getattr(handler, "__name__", request.path)
+        self.stats[f"{name}.requests"] += 1
+        if name in ("get_stats", "control"):
+            return await handler(request)
+
+        delay = self.latency + self.rng.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self.rng.random()
+        if roll < self.error_rate:
+            self.stats[f"{name}.errors"] += 1
+            return web.json_response({"error": "injected failure"}, status=500)
+        if roll < self.error_rate + self.throttle_rate:
+            self.stats[f"{name}.throttled"] += 1
+            return web.json_response(
+                {"message": "You are being rate limited.", "retry_after": self.retry_after},
+                status=429,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        return await handler(request)
+
+    async def update_data(self, request: web.Request) -> web.Response:
+        if self.mutations and self.rng.random() < self.mutate_probability:
+            self.data = mutate_update_data(self.data, self.mutations, self.rng.randrange(2**31))
+            # Encoding a few thousand systems takes a while; keep the loop free
+            self.payload = await asyncio.to_thread(lambda: json.dumps(self.data).encode("utf-8"))
+            self.version += 1
+            self.stats["update_data.mutations"] += 1
+        return web.Response(body=self.payload, content_type="application/json")
+
+    async def universe_ids(self, request: web.Request) -> web.Response:
+        names = await request.json()
+        systems = [{"id": self.system_ids[n], "name": n} for n in names if n in self.system_ids]
+        return web.json_response({"systems": systems} if systems else {})
+
+    async def route(self, request: web.Request) -> web.Response:
+        origin = int(request.match_info["origin"])
+        destination = int(request.match_info["destination"])
+        # Stable made-up length per pair, so cached and fresh answers agree
+        jumps = zlib.crc32(f"{origin}-{destination}".encode()) % 25 + 1
+        route = [origin] + [30000000 + i for i in range(jumps - 1)] + [destination]
+        return web.json_response(route, headers={"Expires": _http_date(time.time() + 300)})
+
+    async def webhook(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.stats["webhook.messages"] += 1
+        logger.debug("📨 Webhook: %s", body.get("content", "")[:200])
+        return web.Response(status=204)
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.stats, "update_data.version": self.version, **self.settings()})
+
+    async def control(self, request: web.Request) -> web.Response:
+        changes: Dict[str, Any] = await request.json()
+        unknown = [key for key in changes if key not in FAULT_SETTINGS]
+        if unknown:
+            return web.json_response({"error": f"unknown settings {unknown}"}, status=400)
+        try:
+            values = {key: type(getattr(self, key))(value) for key, value in changes.items()}
+        except (TypeError, ValueError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+        for key, value in values.items():
+            setattr(self, key, value)
+        logger.info("🎛️ Settings now %s", self.settings())
+        return web.json_response(self.settings())
+
+    def settings(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in FAULT_SETTINGS}
+
+
+def _http_date(timestamp: float) -> str:
+    return time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(timestamp))
+
+
+async def serve(standin: StandIn, port: int, host: str = "127.0.0.1", report_every: Optional[float] = None):
+    runner = web.AppRunner(standin.app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("🧪 Stand-in serving on http://%s:%d with %s", host, port, standin.settings())
+    try:
+        while True:
+            await asyncio.sleep(report_every or 3600)
+            if report_every:
+                logger.info("📊 %s", dict(standin.stats))
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake Pathfinder, ESI and Discord endpoints")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--systems", type=int, default=2000)
+    parser.add_argument("--maps", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds, at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--mutations", type=int, default=4, help="connections changed when a poll mutates the map")
+    parser.add_argument("--mutate-probability", type=float, default=0.2, help="chance that a poll mutates the map")
+    parser.add_argument("--report-every", type=float, default=30, help="seconds between stats lines; 0 for none")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    setup_logging()
+    standin = StandIn(
+        args.systems,
+        args.maps,
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.throttle_rate,
+        args.retry_after,
+        args.mutations,
+        args.mutate_probability,
+        args.seed,
+    )
+    try:
+        asyncio.run(serve(standin, args.port, args.host, args.report_every))
+    except KeyboardInterrupt:
+        logger.info("📊 Final stats: %s", dict(standin.stats))
+
+
+if __name__ == "__main__":
+    main()
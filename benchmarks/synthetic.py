@@ -0,0 +1,125 @@
+import random
+from typing import Any, Dict, List
+
+HOME_SYSTEM_NAME = "J103453"
+
+# Fraction of systems that are high-sec k-space exits
+HIGHSEC_RATIO = 0.05
+# Extra links on top of the spanning tree; real chains are mostly tree-shaped
+EXTRA_EDGE_RATIO = 0.15
+
+
+def highsec_name(index: int) -> str:
+    return f"HS-{index:05d}"
+
+
+def _system(sid: int, map_id: int, name: str, rng: random.Random) -> Dict[str, Any]:
+    # Pathfinder sends many more fields than the bot reads; keep a realistic subset
+    return {
+        "id": sid,
+        "mapId": map_id,
+        "systemId": 31000000 + sid if name.startswith("J") else 30000000 + sid,
+        "name": name,
+        "alias": "",
+        "security": "H" if name.startswith("HS-") else "C3",
+        "trueSec": 0.7 if name.startswith("HS-") else -1,
+        "effect": rng.choice(["", "magnetar", "pulsar", "wolfRayet"]),
+        "statics": [{"name": "D845", "security": "H"}],
+        "position": {"x": rng.randint(0, 4000), "y": rng.randint(0, 2000)},
+        "locked": 0,
+        "rallyUpdated": 0,
+        "userCount": rng.randint(0, 5),
+        "created": {"created": 1700000000, "character": {"id": 1, "name": "Scout"}},
+        "updated": {"updated": 1700000000, "character": {"id": 1, "name": "Scout"}},
+    }
+
+
+def _connection(cid: int, source: int, target: int, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "id": cid,
+        "source": source,
+        "target": target,
+        "scope": "wh",
+        "type": ["wh_fresh", rng.choice(["wh_jump_mass_s", "wh_jump_mass_m", "wh_jump_mass_l", "wh_jump_mass_xl"])],
+        "eolUpdated": None,
+        "created": 1700000000,
+        "updated": 1700000000,
+        "sourceEndpointType": None,
+        "targetEndpointType": None,
+    }
+
+
+def generate_update_data(systems: int = 2000, maps: int = 3, seed: int = 42) -> Dict[str, Any]:
+    """Build a synthetic /api/Map/updateData payload
+
+    Systems are split evenly over the maps. Each map is a random spanning
+    tree plus EXTRA_EDGE_RATIO extra links, and about HIGHSEC_RATIO of
+    the systems are high-sec. The home system is the root of map 0.
+    """
+    rng = random.Random(seed)
+    map_data: List[Dict[str, Any]] = []
+    next_id = 1
+    next_connection = 1
+    highsec_count = 0
+
+    for map_index in range(maps):
+        count = systems // maps + (1 if map_index < systems % maps else 0)
+        ids = list(range(next_id, next_id + count))
+        next_id += count
+
+        map_systems = []
+        for position, sid in enumerate(ids):
+            if map_index == 0 and position == 0:
+                name = HOME_SYSTEM_NAME
+            elif rng.random() < HIGHSEC_RATIO:
+                name = highsec_name(highsec_count)
+                highsec_count += 1
+            else:
+                name = f"J{sid:06d}"
+            map_systems.append(_system(sid, map_index + 1, name, rng))
+
+        links = set()
+        for position in range(1, count):
+            links.add((ids[rng.randrange(position)], ids[position]))
+        for _ in range(int(count * EXTRA_EDGE_RATIO)):
+            a, b = rng.sample(ids, 2) if count > 1 else (ids[0], ids[0])
+            if a != b and (b, a) not in links:
+                links.add((a, b))
+
+        map_connections = []
+        for source, target in sorted(links):
+            map_connections.append(_connection(next_connection, source, target, rng))
+            next_connection += 1
+
+        map_data.append(
+            {
+                "config": {"id": map_index + 1, "name": f"Synthetic {map_index + 1}", "scope": {"name": "wh"}},
+                "data": {"systems": map_systems, "connections": map_connections},
+            }
+        )
+
+    return {
+        "mapData": map_data,
+        "userData": {"character": [{"id": 1, "name": "Scout", "log": {"system": {"id": 31000001}}}]},
+        "mapChanged": [],
+    }
+
+
+def mutate_update_data(data: Dict[str, Any], changes: int = 10, seed: int = 43) -> Dict[str, Any]:
+    """Return a copy of the payload with some connections removed and some added"""
+    rng = random.Random(seed)
+    map_data = []
+    for entry in data["mapData"]:
+        connections = list(entry["data"]["connections"])
+        system_ids = [s["id"] for s in entry["data"]["systems"]]
+        for _ in range(min(changes // 2, len(connections))):
+            connections.pop(rng.randrange(len(connections)))
+        next_connection = max((c["id"] for c in connections), default=0) + 1
+        for _ in range(changes - changes // 2):
+            if len(system_ids) < 2:
+                break
+            source, target = rng.sample(system_ids, 2)
+            connections.append(_connection(next_connection, source, target, rng))
+            next_connection += 1
+        map_data.append({"config": entry["config"], "data": {"systems": entry["data"]["systems"], "connections": connections}})
+    return {**data, "mapData": map_data}
@@ -0,0 +1,15 @@
+import json
+
+from helpers.systems import SYSTEM_TABLE_FILE, write_system_table
+from helpers.universe import UNIVERSE_FILE
+
+
+def build_system_table():
+    with open(UNIVERSE_FILE, "r") as f:
+        systems = json.load(f)["systems"]
+    write_system_table(systems, SYSTEM_TABLE_FILE)
+    print(f"✅ Wrote {len(systems)} systems to {SYSTEM_TABLE_FILE}")
+
+
+if __name__ == "__main__":
+    build_system_table()
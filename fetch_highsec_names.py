@@ -1,77 +1,201 @@
-import requests
+import argparse
 import json
-import time
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from helpers.universe import HIGHSEC_THRESHOLD
 
 FINAL_FILE = "highsec_system_names.json"
 PARTIAL_FILE = "highsec_system_names.partial.json"
+KNOWN_IDS_FILE = "known_system_ids.json"
 
-SLEEP_INTERVAL = 1
-SAVE_EVERY = 50
+MAX_WORKERS = 16
+REQUESTS_PER_SECOND = 20
+BURST = 20
+SAVE_EVERY = 250
 MAX_RETRIES = 3
+REQUEST_TIMEOUT = 10
+
+# Pause everything once ESI reports this few errors left in the window
+ERROR_LIMIT_FLOOR = 10
+
+
+class TokenBucket:
+    """Thread-safe token bucket that also backs off on ESI's error limit"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    elapsed = max(0.0, now - self.updated)
+                    self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+    def observe(self, headers):
+        """Read X-ESI-Error-Limit-* headers and pause until reset when close to the limit"""
+        remain = headers.get("X-ESI-Error-Limit-Remain")
+        reset = headers.get("X-ESI-Error-Limit-Reset")
+        if remain is None or reset is None:
+            return
+        if int(remain) <= ERROR_LIMIT_FLOOR:
+            self.pause(int(reset))
+
+    def pause(self, seconds):
+        with self.lock:
+            resume_at = time.monotonic() + seconds
+            if resume_at > self.paused_until:
+                print(f"⏸️ ESI error limit nearly reached, pausing {seconds}s...")
+                self.paused_until = resume_at
+                self.tokens = 0
+                self.updated = resume_at
 
-def get_all_system_ids():
+
+def get_all_system_ids(session):
     print("📡 Fetching all solar system IDs from ESI...")
     url = "https://esi.evetech.net/latest/universe/systems/"
-    response = requests.get(url)
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
     return response.json()
 
-def get_system_details(system_id):
+
+def get_system_details(session, bucket, system_id):
     url = f"https://esi.evetech.net/latest/universe/systems/{system_id}/"
     for attempt in range(MAX_RETRIES):
+        bucket.acquire()
         try:
-            response = requests.get(url)
+            response = session.get(url, timeout=REQUEST_TIMEOUT)
+            bucket.observe(response.headers)
             if response.status_code == 200:
                 return response.json()
-            else:
-                print(f"⚠️ Status {response.status_code} for {system_id}, retrying...")
+            if response.status_code == 404:
+                return None
+            if response.status_code == 420:
+                bucket.pause(int(response.headers.get("X-ESI-Error-Limit-Reset", 60)))
+            print(f"⚠️ Status {response.status_code} for {system_id}, retrying...")
         except requests.RequestException as e:
             print(f"❌ Error fetching {system_id}: {e}")
-        time.sleep(SLEEP_INTERVAL * (attempt + 1))
+        time.sleep(attempt + 1)
     return None
 
+
 def load_partial():
+    """Return (checked_ids, highsec_names) from the last interrupted run"""
     if os.path.exists(PARTIAL_FILE):
         with open(PARTIAL_FILE, "r") as f:
-            return set(json.load(f))
-    return set()
+            data = json.load(f)
+        # Older checkpoints only stored names, so nothing is known to be checked
+        if isinstance(data, list):
+            return set(), set(data)
+        return set(data["checked_ids"]), set(data["highsec_names"])
+    return set(), set()
 
-def save_partial(highsec_names):
-    with open(PARTIAL_FILE, "w") as f:
-        json.dump(sorted(highsec_names), f)
+
+def save_partial(checked_ids, highsec_names):
+    tmp_file = PARTIAL_FILE + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(
+            {"checked_ids": sorted(checked_ids), "highsec_names": sorted(highsec_names)},
+            f,
+        )
+    os.replace(tmp_file, PARTIAL_FILE)
     print(f"💾 Progress saved: {len(highsec_names)} high-sec systems so far.")
 
-def save_final(highsec_names):
+
+def load_known():
+    """Return (known_ids, highsec_names) from the last completed run"""
+    if not os.path.exists(KNOWN_IDS_FILE) or not os.path.exists(FINAL_FILE):
+        return set(), set()
+    with open(KNOWN_IDS_FILE, "r") as f:
+        known_ids = set(json.load(f))
+    with open(FINAL_FILE, "r") as f:
+        highsec_names = set(json.load(f))
+    return known_ids, highsec_names
+
+
+def save_final(checked_ids, highsec_names):
     with open(FINAL_FILE, "w") as f:
         json.dump(sorted(highsec_names), f, indent=2)
+    with open(KNOWN_IDS_FILE, "w") as f:
+        json.dump(sorted(checked_ids), f)
     print(f"✅ Saved {len(highsec_names)} high-sec system names to {FINAL_FILE}")
     if os.path.exists(PARTIAL_FILE):
         os.remove(PARTIAL_FILE)
 
-def fetch_highsec_system_names():
-    all_ids = get_all_system_ids()
-    highsec_names = load_partial()
-    checked_ids = set()
 
-    # Remove already checked from the list
-    if highsec_names:
-        print(f"🔁 Resuming from {PARTIAL_FILE} with {len(highsec_names)} names...")
+def fetch_highsec_system_names(new_only=False):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS)
+    session.mount("https://", adapter)
+    bucket = TokenBucket(REQUESTS_PER_SECOND, BURST)
+
+    all_ids = get_all_system_ids(session)
+    checked_ids, highsec_names = load_partial()
+
+    if new_only and not checked_ids:
+        checked_ids, highsec_names = load_known()
+        print(f"🆕 Incremental mode: {len(checked_ids)} systems already known")
+    elif checked_ids:
+        print(f"🔁 Resuming from {PARTIAL_FILE} with {len(checked_ids)} systems checked...")
+
     remaining_ids = [sid for sid in all_ids if sid not in checked_ids]
+    print(f"🔍 {len(remaining_ids)} systems to check...")
 
-    for i, sid in enumerate(remaining_ids, start=1):
-        data = get_system_details(sid)
-        if data and data.get("security_status", 0.0) >= 0.5:
-            highsec_names.add(data["name"])
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(get_system_details, session, bucket, sid): sid
+            for sid in remaining_ids
+        }
+        try:
+            for i, future in enumerate(as_completed(futures), start=1):
+                sid = futures[future]
+                data = future.result()
+                if data is None:
+                    # Leave it unchecked so the next run tries again
+                    continue
+                checked_ids.add(sid)
+                if data.get("security_status", 0.0) >= HIGHSEC_THRESHOLD:
+                    highsec_names.add(data["name"])
 
-        if i % SAVE_EVERY == 0:
-            save_partial(highsec_names)
-            print(f"🔍 Checked {i}/{len(remaining_ids)} systems...")
+                if i % SAVE_EVERY == 0:
+                    save_partial(checked_ids, highsec_names)
+                    print(f"🔍 Checked {i}/{len(remaining_ids)} systems...")
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            save_partial(checked_ids, highsec_names)
+            raise
 
-        time.sleep(SLEEP_INTERVAL)
+    return checked_ids, highsec_names
 
-    return highsec_names
 
 if __name__ == "__main__":
-    highsec_names = fetch_highsec_system_names()
-    save_final(highsec_names)
+    parser = argparse.ArgumentParser(description="Rebuild the high-sec system name list from ESI")
+    parser.add_argument(
+        "--new-only",
+        action="store_true",
+        help="only check systems missing from the last completed run",
+    )
+    args = parser.parse_args()
+
+    checked_ids, highsec_names = fetch_highsec_system_names(new_only=args.new_only)
+    save_final(checked_ids, highsec_names)
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+
+import requests
+
+from helpers.universe import UNIVERSE_FILE
+
+SDE_BASE_URL = "https://www.fuzzwork.co.uk/dump/latest/csv"
+SYSTEMS_CSV = f"{SDE_BASE_URL}/mapSolarSystems.csv"
+JUMPS_CSV = f"{SDE_BASE_URL}/mapSolarSystemJumps.csv"
+
+
+def download_csv(url):
+    print(f"📡 Downloading {url}...")
+    response = requests.get(url)
+    response.raise_for_status()
+    return csv.DictReader(io.StringIO(response.text))
+
+
+def get_systems():
+    systems = []
+    for row in download_csv(SYSTEMS_CSV):
+        systems.append(
+            [
+                int(row["solarSystemID"]),
+                row["solarSystemName"],
+                round(float(row["security"]), 4),
+                int(row["constellationID"]),
+                int(row["regionID"]),
+            ]
+        )
+    return systems
+
+
+def get_jumps():
+    # The SDE lists every gate in both directions; keep one row per pair
+    jumps = set()
+    for row in download_csv(JUMPS_CSV):
+        a = int(row["fromSolarSystemID"])
+        b = int(row["toSolarSystemID"])
+        jumps.add((min(a, b), max(a, b)))
+    return sorted(jumps)
+
+
+def save_universe(systems, jumps):
+    with open(UNIVERSE_FILE, "w") as f:
+        json.dump({"systems": systems, "jumps": [list(j) for j in jumps]}, f)
+    print(f"✅ Saved {len(systems)} systems and {len(jumps)} stargate links to {UNIVERSE_FILE}")
+
+
+if __name__ == "__main__":
+    save_universe(get_systems(), get_jumps())
@@ -1,13 +1,26 @@
 import os
 import time
 import json
+import logging
+import tempfile
+import threading
 import requests
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 
+from .transport import Transport
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+TOKEN_URL = "https://login.eveonline.com/v2/oauth/token"
+# Refresh this long before expiry so a fetch never finds the token stale
+REFRESH_MARGIN = timedelta(minutes=5)
+REFRESH_RETRY_BASE = 15
+REFRESH_RETRY_CAP = 300
+
 class EVEAuth:
     """Handles EVE Online SSO authentication and token management"""
     
@@ -19,6 +32,14 @@ class EVEAuth:
         self.access_token = None
         self.refresh_token = None
         self.token_expires_at = None
+        # Token endpoint calls are not retried: a refresh token may be single-use
+        self.transport = Transport(retries=0)
+        # Held for the whole refresh; generation tells waiters someone else already did it
+        self.refresh_lock = threading.Lock()
+        self.generation = 0
+        self._refresher = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
         
         # Load existing tokens if available
         self._load_tokens()
@@ -35,17 +56,26 @@ class EVEAuth:
                     if expires_at:
                         self.token_expires_at = datetime.fromisoformat(expires_at)
             except Exception as e:
-                print(f"⚠️ Error loading tokens: {e}")
+                logger.warning("⚠️ Error loading tokens: %s", e)
     
     def _save_tokens(self):
-        """Save tokens to file"""
+        """Save tokens to file atomically, readable only by the owner"""
         data = {
             'access_token': self.access_token,
             'refresh_token': self.refresh_token,
             'expires_at': self.token_expires_at.isoformat() if self.token_expires_at else None
         }
-        with open(self.token_file, 'w') as f:
-            json.dump(data, f)
+        directory = os.path.dirname(os.path.abspath(self.token_file))
+        fd, tmp_path = tempfile.mkstemp(prefix=".eve_tokens.", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.token_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
     
     def get_auth_url(self) -> str:
         """Generate EVE SSO authorization URL"""
@@ -66,7 +96,7 @@ class EVEAuth:
     
     def exchange_code_for_token(self, auth_code: str) -> bool:
         """Exchange authorization code for access token"""
-        url = "https://login.eveonline.com/v2/oauth/token"
+        url = TOKEN_URL
         
         data = {
             'grant_type': 'authorization_code',
@@ -81,7 +111,7 @@ class EVEAuth:
         }
         
         try:
-            response = requests.post(url, data=data, headers=headers)
+            response = self.transport.post(url, data=data, headers=headers)
             response.raise_for_status()
             token_data = response.json()
             
@@ -90,20 +120,34 @@ class EVEAuth:
             self.token_expires_at = datetime.now() + timedelta(seconds=token_data['expires_in'])
             
             self._save_tokens()
-            print("✅ Successfully obtained EVE SSO tokens")
+            logger.info("✅ Successfully obtained EVE SSO tokens")
             return True
             
         except Exception as e:
-            print(f"❌ Error exchanging code for token: {e}")
+            logger.error("❌ Error exchanging code for token: %s", e)
             return False
     
     def refresh_access_token(self) -> bool:
-        """Refresh the access token using refresh token"""
+        """Refresh the access token using refresh token
+
+        Single-flight: concurrent callers wait for the refresh already in
+        progress and share its result instead of starting another one.
+        """
+        generation = self.generation
+        with self.refresh_lock:
+            if self.generation != generation:
+                return self.access_token is not None
+            refreshed = self._refresh_locked()
+            if refreshed:
+                self.generation += 1
+            return refreshed
+
+    def _refresh_locked(self) -> bool:
         if not self.refresh_token:
-            print("❌ No refresh token available")
+            logger.error("❌ No refresh token available")
             return False
         
-        url = "https://login.eveonline.com/v2/oauth/token"
+        url = TOKEN_URL
         
         data = {
             'grant_type': 'refresh_token',
@@ -118,7 +162,7 @@ class EVEAuth:
         }
         
         try:
-            response = requests.post(url, data=data, headers=headers)
+            response = self.transport.post(url, data=data, headers=headers)
             response.raise_for_status()
             token_data = response.json()
             
@@ -127,30 +171,66 @@ class EVEAuth:
             self.token_expires_at = datetime.now() + timedelta(seconds=token_data['expires_in'])
             
             self._save_tokens()
-            print("✅ Successfully refreshed EVE SSO tokens")
+            logger.info("✅ Successfully refreshed EVE SSO tokens")
             return True
             
         except Exception as e:
-            print(f"❌ Error refreshing token: {e}")
+            logger.error("❌ Error refreshing token: %s", e)
             return False
     
     def get_valid_token(self) -> Optional[str]:
-        """Get a valid access token, refreshing if necessary"""
+        """Get a valid access token, refreshing if necessary
+
+        With the background refresher running this never blocks: a token
+        inside the refresh margin is still returned while the refresher
+        renews it.
+        """
         if not self.access_token:
-            print("❌ No access token available")
+            logger.debug("No access token available")
             return None
         
-        # Check if token is expired or will expire soon (within 5 minutes)
-        if self.token_expires_at and datetime.now() + timedelta(minutes=5) >= self.token_expires_at:
-            print("🔄 Access token expired or expiring soon, refreshing...")
-            if not self.refresh_access_token():
-                return None
-        
-        # Debug: Check token format
-        if self.access_token:
-            print(f"🔍 Token available: {self.access_token[:20]}...")
+        if self._seconds_until_refresh() <= 0:
+            if self._refresher is not None and self._refresher.is_alive():
+                self._wake.set()
+                if datetime.now() >= self.token_expires_at:
+                    return None
+            else:
+                logger.info("🔄 Access token expired or expiring soon, refreshing...")
+                if not self.refresh_access_token():
+                    return None
         
         return self.access_token
+
+    def start_refresher(self):
+        """Renew the access token from a daemon thread shortly before it expires"""
+        if not self.refresh_token or (self._refresher is not None and self._refresher.is_alive()):
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="eve-token-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _seconds_until_refresh(self) -> float:
+        if self.token_expires_at is None:
+            return float("inf")
+        return (self.token_expires_at - REFRESH_MARGIN - datetime.now()).total_seconds()
+
+    def _refresh_loop(self):
+        failures = 0
+        while not self._stop.is_set():
+            delay = self._seconds_until_refresh()
+            if delay > 0:
+                self._wake.wait(min(delay, REFRESH_RETRY_CAP))
+                self._wake.clear()
+                continue
+            if self.refresh_access_token():
+                failures = 0
+                continue
+            failures += 1
+            self._stop.wait(min(REFRESH_RETRY_CAP, REFRESH_RETRY_BASE * 2 ** (failures - 1)))
     
     def get_character_info(self) -> Optional[Dict[str, Any]]:
         """Get character information from EVE SSO"""
@@ -165,7 +245,7 @@ class EVEAuth:
             character_id = decoded.get('sub', '').split(':')[-1]
             character_name = decoded.get('name', 'Unknown')
             
-            print(f"🔍 Token decoded - Character ID: {character_id}, Name: {character_name}")
+            logger.info("🔍 Token decoded - Character ID: %s, Name: %s", character_id, character_name)
             
             # Return basic character info from the token
             return {
@@ -176,10 +256,10 @@ class EVEAuth:
             }
             
         except jwt.InvalidTokenError:
-            print("❌ Invalid JWT token format")
+            logger.error("❌ Invalid JWT token format")
             return None
         except Exception as e:
-            print(f"❌ Error getting character info: {e}")
+            logger.error("❌ Error getting character info: %s", e)
             return None
     
     def is_authenticated(self) -> bool:
@@ -198,16 +278,16 @@ class PathfinderAuth:
     def authenticate_with_pathfinder(self) -> bool:
         """Authenticate with Pathfinder using EVE SSO tokens"""
         if not self.eve_auth.is_authenticated():
-            print("❌ EVE authentication required first")
+            logger.error("❌ EVE authentication required first")
             return False
         
         # Get character info
         char_info = self.eve_auth.get_character_info()
         if not char_info:
-            print("❌ Could not get character info")
+            logger.error("❌ Could not get character info")
             return False
         
-        print(f"👤 Authenticating as: {char_info.get('name', 'Unknown')}")
+        logger.info("👤 Authenticating as: %s", char_info.get("name", "Unknown"))
         
         # Note: Most Pathfinder instances don't support EVE SSO authentication directly
         # They typically use session-based authentication with cookies
@@ -216,7 +296,6 @@ class PathfinderAuth:
             # Set up basic headers for Pathfinder
             self.session.headers.update({
                 "Accept": "application/json, text/javascript, */*; q=0.01",
-                "Accept-Encoding": "gzip, deflate, br, zstd",
                 "Accept-Language": "en-US,en;q=0.9",
                 "User-Agent": "Mozilla/5.0",
                 "X-Requested-With": "XMLHttpRequest",
@@ -225,13 +304,13 @@ class PathfinderAuth:
             
             # For now, we'll just set up the headers but note that EVE SSO
             # authentication with Pathfinder is not widely supported
-            print("⚠️ EVE SSO authentication with Pathfinder is experimental")
-            print("💡 Most Pathfinder instances require manual session cookies")
+            logger.warning("⚠️ EVE SSO authentication with Pathfinder is experimental")
+            logger.info("💡 Most Pathfinder instances require manual session cookies")
             
             return True
             
         except Exception as e:
-            print(f"❌ Error setting up Pathfinder authentication: {e}")
+            logger.error("❌ Error setting up Pathfinder authentication: %s", e)
             return False
     
     def get_session_headers(self) -> Dict[str, str]:
@@ -0,0 +1,208 @@
+from itertools import chain
+from typing import Collection, Iterable, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Below this many nodes a dict BFS keeps up with patching the CSR copy and converting
+# its result back to dicts; measured about even at 5-10k nodes and 2x slower at 20k
+VECTORIZE_MIN_NODES = 10000
+
+
+class CSRGraph:
+    """Integer-indexed copy of an undirected chain in CSR form
+
+    Pathfinder system IDs are mapped to dense indices 0..n-1 (in ID order,
+    so ids is sorted and lookups are a binary search). The neighbors of
+    node i are neighbors[offsets[i]:offsets[i + 1]], sorted. Built in one
+    pass of NumPy array operations from the connection list, then patched
+    in place with add_links/remove_links as links come and go.
+    """
+
+    def __init__(self, connections: Collection[Tuple[int, int]], nodes: Iterable[int] = ()):
+        pairs = np.fromiter(chain.from_iterable(connections), dtype=np.int64, count=2 * len(connections))
+        pairs = pairs.reshape(-1, 2)
+        extra = np.fromiter(nodes, dtype=np.int64)
+        self.ids, inverse = _unique_inverse(np.concatenate((pairs.ravel(), extra)))
+        ends = inverse[: pairs.size].reshape(-1, 2)
+
+        # Both directions of every link, without the duplicates of links listed both ways
+        sources = np.concatenate((ends[:, 0], ends[:, 1]))
+        targets = np.concatenate((ends[:, 1], ends[:, 0]))
+        n = len(self.ids)
+        sources, targets = np.divmod(_sorted_unique(sources * n + targets), n)
+
+        self.neighbors = targets.astype(np.int32)
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=self.offsets[1:])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def indices(self, sids: Iterable[int]) -> "np.ndarray":
+        """Dense indices of the given system IDs, skipping any not in the graph"""
+        sids = np.fromiter(sids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, sids)
+        valid = positions < len(self.ids)
+        valid[valid] = self.ids[positions[valid]] == sids[valid]
+        return positions[valid]
+
+    def mask(self, sids: Iterable[int]) -> "np.ndarray":
+        """Boolean node mask that is True for the given system IDs"""
+        mask = np.zeros(len(self.ids), dtype=bool)
+        mask[self.indices(sids)] = True
+        return mask
+
+    def nearest(self, distances: "np.ndarray", sids: Iterable[int]) -> Optional[int]:
+        """System ID of the closest reached node among sids (lowest ID on ties), or None"""
+        reached = (self.mask(sids) & (distances >= 0)).nonzero()[0]
+        if not len(reached):
+            return None
+        return int(self.ids[reached[np.argmin(distances[reached])]])
+
+    def add_nodes(self, sids: Iterable[int]):
+        """Add isolated nodes for any system IDs not in the graph yet"""
+        new = _sorted_unique(np.fromiter(sids, dtype=np.int64))
+        new = new[self._missing(new)]
+        if not len(new):
+            return
+        positions = np.searchsorted(self.ids, new)
+        # Every existing index moves up by the number of new IDs sorted before it
+        shift = np.searchsorted(new, self.ids)
+        self.neighbors = (self.neighbors + shift[self.neighbors]).astype(np.int32)
+        self.offsets = np.insert(self.offsets, positions, self.offsets[positions])
+        self.ids = np.insert(self.ids, positions, new)
+
+    def _missing(self, sids):
+        # Mask of the system IDs that are not in the graph
+        positions = np.searchsorted(self.ids, sids)
+        missing = positions >= len(self.ids)
+        missing[~missing] = self.ids[positions[~missing]] != sids[~missing]
+        return missing
+
+    def add_links(self, links: Collection[Tuple[int, int]]):
+        """Insert undirected links, each listed once and not in the graph yet
+
+        Unknown endpoints are added as nodes first. Each node's neighbors
+        stay sorted, so a patch costs a few array copies, not the sort a
+        rebuild does.
+        """
+        if not links:
+            return
+        self.add_nodes(chain.from_iterable(links))
+        sources, targets = self._directed(links)
+        slots = self._slots(sources, targets)
+        # Equal slots can belong to an empty slice and the next node's, so order by source too
+        order = np.lexsort((targets, sources, slots))
+        self.neighbors = np.insert(self.neighbors, slots[order], targets[order].astype(np.int32))
+        self.offsets[1:] += np.cumsum(np.bincount(sources, minlength=len(self.ids)))
+
+    def remove_links(self, links: Collection[Tuple[int, int]]):
+        """Drop undirected links, each listed once and in the graph; their nodes stay"""
+        if not links:
+            return
+        sources, targets = self._directed(links)
+        self.neighbors = np.delete(self.neighbors, self._slots(sources, targets))
+        self.offsets[1:] -= np.cumsum(np.bincount(sources, minlength=len(self.ids)))
+
+    def _directed(self, links):
+        # Node indices for both directions of each link
+        ends = self.indices(chain.from_iterable(links)).reshape(-1, 2)
+        return np.concatenate((ends[:, 0], ends[:, 1])), np.concatenate((ends[:, 1], ends[:, 0]))
+
+    def _slots(self, sources, targets):
+        # Where each target sits, or would sit, in its source's sorted neighbor slice;
+        # slices are in node order, so (owner, neighbor) keys are sorted across the whole array
+        n = len(self.ids)
+        owners = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.offsets))
+        return np.searchsorted(owners * n + self.neighbors, sources * n + targets)
+
+    def bfs(self, sources: Sequence[int], vectorized: Optional[bool] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Multi-source BFS from node indices; returns (distances, parents)
+
+        Unreached nodes have distance -1; sources and unreached nodes have
+        parent -1. With vectorized=None the frontier is expanded with array
+        operations once the graph has VECTORIZE_MIN_NODES nodes.
+        """
+        n = len(self.ids)
+        distances = np.full(n, -1, dtype=np.int32)
+        parents = np.full(n, -1, dtype=np.int32)
+        frontier = _sorted_unique(np.asarray(sources, dtype=np.int64))
+        if not len(frontier):
+            return distances, parents
+        distances[frontier] = 0
+        if vectorized is None:
+            vectorized = n >= VECTORIZE_MIN_NODES
+        if vectorized:
+            self._expand_vectorized(frontier, distances, parents)
+        else:
+            self._expand_queue(frontier.tolist(), distances, parents)
+        return distances, parents
+
+    def _expand_vectorized(self, frontier, distances, parents):
+        offsets, neighbors = self.offsets, self.neighbors
+        depth = 0
+        while len(frontier):
+            depth += 1
+            starts = offsets[frontier]
+            counts = offsets[frontier + 1] - starts
+            total = int(counts.sum())
+            if not total:
+                break
+            # Every frontier node's neighbor slice, gathered in one go
+            owners = np.repeat(frontier, counts)
+            positions = np.arange(total) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+            candidates = neighbors[positions]
+            fresh = distances[candidates] < 0
+            candidates, owners = candidates[fresh], owners[fresh]
+            # The first frontier node to reach a neighbor becomes its parent
+            order = np.argsort(candidates, kind="stable")
+            candidates, owners = candidates[order], owners[order]
+            first = _run_starts(candidates)
+            frontier = candidates[first]
+            distances[frontier] = depth
+            parents[frontier] = owners[first]
+
+    def _expand_queue(self, queue, distances, parents):
+        offsets = self.offsets.tolist()
+        neighbors = self.neighbors.tolist()
+        dist = distances.tolist()
+        parent = parents.tolist()
+        head = 0
+        while head < len(queue):
+            current = queue[head]
+            head += 1
+            depth = dist[current] + 1
+            for neighbor in neighbors[offsets[current] : offsets[current + 1]]:
+                if dist[neighbor] < 0:
+                    dist[neighbor] = depth
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+        distances[:] = dist
+        parents[:] = parent
+
+
+def _run_starts(values: "np.ndarray") -> "np.ndarray":
+    # Mask of the first element of each run of equal values in a sorted array
+    starts = np.ones(len(values), dtype=bool)
+    np.not_equal(values[1:], values[:-1], out=starts[1:])
+    return starts
+
+
+def _sorted_unique(values: "np.ndarray") -> "np.ndarray":
+    # np.unique without its overhead; sorting plus a run mask is much faster on int arrays
+    values = np.sort(values)
+    return values[_run_starts(values)]
+
+
+def _unique_inverse(values: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    # Sorted unique values and each input's index into them
+    order = np.argsort(values)
+    ordered = values[order]
+    starts = _run_starts(ordered)
+    inverse = np.empty(len(values), dtype=np.int64)
+    inverse[order] = np.cumsum(starts) - 1
+    return ordered[starts], inverse
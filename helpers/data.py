@@ -1,31 +1,135 @@
+import atexit
+import gzip
 import os
 import json
-import time 
+import shutil
+import threading
+import time
 
 LAST_PATH_FILE = "last_path.json"
 CONNECTIONS_FILE = "connections.json"
 
-def load_last_path():
-    if os.path.exists(LAST_PATH_FILE):
-        with open(LAST_PATH_FILE, "r") as f:
+ALERT_LOG_FILE = "wh_alerts.log"
+ALERT_LOG_MAX_BYTES = 5 * 1024 * 1024
+ALERT_LOG_MAX_AGE = 7 * 24 * 3600
+ALERT_LOG_BACKUPS = 5
+ALERT_LOG_FLUSH_INTERVAL = 5
+
+def load_last_path(path=LAST_PATH_FILE):
+    if os.path.exists(path):
+        with open(path, "r") as f:
             return json.load(f)
     return []
 
-def save_last_path(path):
-    with open(LAST_PATH_FILE, "w") as f:
-        json.dump(path, f)
-
 
-def load_prior_connections():
-    if os.path.exists(CONNECTIONS_FILE):
-        with open(CONNECTIONS_FILE, "r") as f:
+def load_prior_connections(path=CONNECTIONS_FILE):
+    if os.path.exists(path):
+        with open(path, "r") as f:
             return set(tuple(conn) for conn in json.load(f))
     return set()
 
-def save_prior_connections(connections):
-    with open(CONNECTIONS_FILE, "w") as f:
-        json.dump([list(conn) for conn in connections], f)
+
+class AlertLogWriter:
+    """Keeps the alert log open, buffers lines and rotates it
+
+    Lines are written on flush(): at the end of each polling cycle, every
+    few seconds from a background timer, and at exit. The log rotates to
+    gzip-compressed backups (wh_alerts.log.1.gz, ...) once it passes a
+    size limit or its first entry gets too old.
+    """
+
+    def __init__(
+        self,
+        path=ALERT_LOG_FILE,
+        max_bytes=ALERT_LOG_MAX_BYTES,
+        max_age=ALERT_LOG_MAX_AGE,
+        backups=ALERT_LOG_BACKUPS,
+        flush_interval=ALERT_LOG_FLUSH_INTERVAL,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.buffer = []
+        self._open()
+
+        timer = threading.Thread(target=self._flush_periodically, name="alert-log", daemon=True)
+        timer.start()
+        atexit.register(self.flush)
+
+    def write(self, message):
+        with self.lock:
+            self.buffer.append(f"{time.ctime()} - {message}\n")
+
+    def flush(self):
+        with self.lock:
+            if not self.buffer:
+                return
+            self.file.writelines(self.buffer)
+            self.file.flush()
+            if self.started_at is None:
+                self.started_at = time.time()
+            self.buffer = []
+            if self._should_rotate():
+                self._rotate()
+
+    def _open(self):
+        self.file = open(self.path, "a")
+        self.started_at = self._first_entry_time()
+
+    def _first_entry_time(self):
+        # Lines start with a time.ctime() stamp, which is always 24 characters
+        try:
+            with open(self.path, "r") as f:
+                first_line = f.readline()
+            return time.mktime(time.strptime(first_line[:24]))
+        except (OSError, ValueError):
+            return None
+
+    def _should_rotate(self):
+        if self.file.tell() >= self.max_bytes:
+            return True
+        return self.started_at is not None and time.time() - self.started_at >= self.max_age
+
+    def _rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}.gz"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}.gz")
+        with open(self.path, "rb") as src, gzip.open(f"{self.path}.1.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(self.path)
+        self._open()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+_alert_log = None
+_alert_log_lock = threading.Lock()
+_alert_log_path = ALERT_LOG_FILE
+
+def _get_alert_log():
+    global _alert_log
+    with _alert_log_lock:
+        if _alert_log is None:
+            _alert_log = AlertLogWriter(_alert_log_path)
+        return _alert_log
+
+def set_alert_log_path(path):
+    """Point the alert log elsewhere; only takes effect before the first alert"""
+    global _alert_log_path
+    _alert_log_path = path
 
 def log_alert(message):
-    with open("wh_alerts.log", "a") as f:
-        f.write(f"{time.ctime()} - {message}\n")
\ No newline at end of file
+    _get_alert_log().write(message)
+
+def flush_alerts():
+    """Write out buffered alert log lines; called at the end of each cycle"""
+    if _alert_log is not None:
+        _alert_log.flush()
@@ -0,0 +1,113 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+Connection = Tuple[int, int]
+
+# A connection change is alerted once it has been seen in this many polls in a row...
+DEFAULT_CONFIRM_CYCLES = 2
+# ...or has held for this long, whichever comes first
+DEFAULT_CONFIRM_SECONDS = 180
+# An alert identical to one sent within this window is dropped
+DEFAULT_DEDUP_WINDOW = 3600
+DEDUP_MAX_ENTRIES = 1024
+
+
+def undirected(connection: Connection) -> Connection:
+    source, target = connection
+    return (source, target) if source <= target else (target, source)
+
+
+class FlapSuppressor:
+    """Holds connection changes back until they have persisted
+
+    Connections are compared undirected, so a link that flips between
+    (a, b) and (b, a) is no change at all. A link that blinks out and
+    back before it is confirmed never alerts.
+    """
+
+    def __init__(
+        self,
+        announced: Iterable[Connection] = (),
+        confirm_cycles: int = DEFAULT_CONFIRM_CYCLES,
+        confirm_seconds: float = DEFAULT_CONFIRM_SECONDS,
+    ):
+        self.confirm_cycles = confirm_cycles
+        self.confirm_seconds = confirm_seconds
+        # What alerts have told people so far: undirected key -> the orientation last seen
+        self.announced: Dict[Connection, Connection] = {undirected(c): c for c in announced}
+        # Unconfirmed changes: undirected key -> (polls seen, first seen)
+        self.pending: Dict[Connection, Tuple[int, float]] = {}
+        self.flaps = 0
+
+    def seed(self, connections: Iterable[Connection]):
+        """Take connections as already announced, without reporting them as changes"""
+        self.announced = {undirected(c): c for c in connections}
+        self.pending.clear()
+
+    def update(
+        self, connections: Set[Connection], changed: Iterable[Connection] = (), now: Optional[float] = None
+    ) -> Tuple[List[Connection], List[Connection]]:
+        """Feed one poll's connections and raw changes; returns the (added, removed) now confirmed"""
+        now = time.time() if now is None else now
+        added: List[Connection] = []
+        removed: List[Connection] = []
+        self.flaps = 0
+        for key in set(self.pending) | {undirected(c) for c in changed}:
+            source, target = key
+            present = (source, target) in connections or (target, source) in connections
+            if present == (key in self.announced):
+                if self.pending.pop(key, None) is not None:
+                    self.flaps += 1
+                continue
+
+            seen, since = self.pending.get(key, (0, now))
+            seen += 1
+            if seen < self.confirm_cycles and now - since < self.confirm_seconds:
+                self.pending[key] = (seen, since)
+                continue
+            self.pending.pop(key, None)
+            if present:
+                connection = key if key in connections else (target, source)
+                self.announced[key] = connection
+                added.append(connection)
+            else:
+                removed.append(self.announced.pop(key))
+        return added, removed
+
+
+class AlertDeduplicator:
+    """Remembers the last state alerted for each key so a repeat of it is not sent again
+
+    Only a repeat of the key's last state is dropped; any other state
+    replaces it, so "added", "removed", "added" for one link sends all
+    three and a route that goes A -> B -> A announces A again. Entries
+    expire after the window, and only the newest DEDUP_MAX_ENTRIES keys
+    are kept.
+    """
+
+    def __init__(self, window: float = DEFAULT_DEDUP_WINDOW, max_entries: int = DEDUP_MAX_ENTRIES):
+        self.window = window
+        self.max_entries = max_entries
+        # key -> (digest of the last state sent, when it was sent)
+        self.last: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+
+    def should_send(self, key: str, state: Optional[str] = None, now: Optional[float] = None) -> bool:
+        """Record state as sent for key unless it repeats the last one; a None state is the key itself"""
+        now = time.time() if now is None else now
+        while self.last:
+            _, sent_at = next(iter(self.last.values()))
+            if now - sent_at < self.window:
+                break
+            self.last.popitem(last=False)
+
+        digest = hashlib.blake2b((key if state is None else state).encode("utf-8"), digest_size=16).digest()
+        previous = self.last.get(key)
+        if previous is not None and previous[0] == digest:
+            return False
+        self.last[key] = (digest, now)
+        self.last.move_to_end(key)
+        if len(self.last) > self.max_entries:
+            self.last.popitem(last=False)
+        return True
@@ -0,0 +1,87 @@
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, NamedTuple, Optional, Tuple
+
+# Mass states in order of how close the hole is to collapsing
+MASS_STATES = ("fresh", "reduced", "critical")
+
+# Pathfinder's jump mass tags; s fits frigates only, xl fits capitals
+JUMP_SIZES = {
+    "frigate": "s",
+    "wh_jump_mass_s": "s",
+    "wh_jump_mass_m": "m",
+    "wh_jump_mass_l": "l",
+    "wh_jump_mass_xl": "xl",
+}
+
+# Extra cost so a usable but risky hole loses to a safe one of similar length
+EOL_PENALTY = 5
+REDUCED_PENALTY = 1
+CRITICAL_PENALTY = 10
+
+
+class Edge(NamedTuple):
+    """A wormhole connection with the attributes that decide who can use it"""
+
+    source: int
+    target: int
+    eol: bool = False
+    mass: str = "fresh"
+    # None when the map has no size tag for the hole
+    size: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        return self.source, self.target
+
+
+class ShipClass(NamedTuple):
+    sizes: FrozenSet[Optional[str]]
+    # Heaviest mass state this class will still jump through
+    max_mass: str
+    eol_allowed: bool
+
+
+SHIP_CLASSES: Dict[str, ShipClass] = {
+    "frigate": ShipClass(frozenset(("s", "m", "l", "xl", None)), "critical", True),
+    "battleship": ShipClass(frozenset(("l", "xl", None)), "reduced", True),
+    "capital": ShipClass(frozenset(("xl",)), "reduced", False),
+}
+
+
+@lru_cache(maxsize=256)
+def _type_attributes(types: Tuple[str, ...]) -> Tuple[bool, str, Optional[str]]:
+    # A map only uses a handful of distinct tag lists, so this is nearly always a cache hit
+    mass = "critical" if "wh_critical" in types else "reduced" if "wh_reduced" in types else "fresh"
+    size = None
+    for tag in types:
+        size = JUMP_SIZES.get(tag, size)
+    return "wh_eol" in types, mass, size
+
+
+def parse_connection(connection: Dict[str, Any]) -> Edge:
+    """Build an Edge from a Pathfinder connection object"""
+    eol, mass, size = _type_attributes(tuple(connection.get("type") or ()))
+    return Edge(connection["source"], connection["target"], eol or bool(connection.get("eolUpdated")), mass, size)
+
+
+def edge_weight(edge: Edge, ship_class: ShipClass) -> Optional[int]:
+    """Cost of taking this hole in the given ship class, or None if it cannot"""
+    return _attribute_weight(edge.eol, edge.mass, edge.size, ship_class)
+
+
+@lru_cache(maxsize=256)
+def _attribute_weight(eol: bool, mass: str, size: Optional[str], ship_class: ShipClass) -> Optional[int]:
+    if size not in ship_class.sizes:
+        return None
+    if MASS_STATES.index(mass) > MASS_STATES.index(ship_class.max_mass):
+        return None
+    if eol and not ship_class.eol_allowed:
+        return None
+    weight = 1
+    if eol:
+        weight += EOL_PENALTY
+    if mass == "reduced":
+        weight += REDUCED_PENALTY
+    elif mass == "critical":
+        weight += CRITICAL_PENALTY
+    return weight
@@ -1,17 +1,94 @@
+import json
+import os
+import threading
+
 import requests
+from dotenv import load_dotenv
 
-def resolve_system_name_to_id(name):
-    url = "https://esi.evetech.net/latest/universe/ids/"
-    response = requests.post(url, json=[name])
-    response.raise_for_status()
+from .esi_cache import ESI_CACHE_FILE, ESICache, parse_expires
+from .metrics import ESI_CACHE, ESI_ERRORS, ESI_SECONDS
+from .transport import Transport
+
+load_dotenv()
+
+# Overridable so tests and load runs can point at benchmarks/standin.py
+ESI_BASE_URL = os.getenv("ESI_BASE_URL", "https://esi.evetech.net/latest")
+
+# universe/ids answers never change, and ESI sends them without an Expires header
+IMMUTABLE_TTL = 30 * 24 * 3600
+
+transport = Transport()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The shared ESI cache, opened on first use at ESI_CACHE_FILE"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ESICache(ESI_CACHE_FILE)
+        return _cache
+
+
+def cached_request(method, url, payload=None, default_ttl=0):
+    """Return (status_code, data) for an ESI call, served from cache while fresh
+
+    Stale entries are revalidated with If-None-Match so an unchanged
+    response only costs a 304. Responses without an Expires header stay
+    fresh for default_ttl seconds.
+    """
+    cache = get_cache()
+    key = f"{method} {url}"
+    if payload is not None:
+        key += " " + json.dumps(payload, sort_keys=True)
+
+    entry = cache.get(key)
+    if entry is not None and entry.is_fresh():
+        cache.count("hit")
+        ESI_CACHE.inc(result="hit")
+        return 200, entry.data
+
+    headers = {}
+    if entry is not None and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    try:
+        with ESI_SECONDS.time():
+            response = transport.request(method, url, json=payload, headers=headers)
+    except requests.RequestException:
+        ESI_ERRORS.inc(status="network")
+        raise
+
+    if response.status_code == 304 and entry is not None:
+        cache.count("revalidated")
+        ESI_CACHE.inc(result="revalidated")
+        cache.put(key, entry.data, entry.etag, parse_expires(response.headers, default_ttl))
+        return 200, entry.data
+
+    cache.count("miss")
+    ESI_CACHE.inc(result="miss")
+    if response.status_code != 200:
+        ESI_ERRORS.inc(status=response.status_code)
+        return response.status_code, None
     data = response.json()
+    cache.put(key, data, response.headers.get("ETag"), parse_expires(response.headers, default_ttl))
+    return 200, data
+
+
+def resolve_system_name_to_id(name):
+    url = f"{ESI_BASE_URL}/universe/ids/"
+    status, data = cached_request("POST", url, [name], default_ttl=IMMUTABLE_TTL)
+    if status != 200:
+        raise requests.HTTPError(f"ESI returned {status} resolving {name}")
     if "systems" in data:
         return data["systems"][0]["id"]
     return None
 
+
 def get_route_length(origin_id, destination_id):
-    url = f"https://esi.evetech.net/latest/route/{origin_id}/{destination_id}/?flag=secure"
-    r = requests.get(url)
-    if r.status_code == 200:
-        return len(r.json()) - 1
-    return None
\ No newline at end of file
+    url = f"{ESI_BASE_URL}/route/{origin_id}/{destination_id}/?flag=secure"
+    status, data = cached_request("GET", url)
+    if status == 200:
+        return len(data) - 1
+    return None
@@ -0,0 +1,111 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+ESI_CACHE_FILE = os.getenv("ESI_CACHE_FILE", "esi_cache.sqlite3")
+MAX_MEMORY_ENTRIES = 2048
+# Expired rows are kept this long for If-None-Match revalidation, then pruned
+PRUNE_AFTER = 7 * 24 * 3600
+
+
+class CacheEntry(NamedTuple):
+    data: Any
+    etag: Optional[str]
+    expires: float
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires
+
+
+def parse_expires(headers, default_ttl: float = 0) -> float:
+    """Turn an ESI Expires header into a unix timestamp
+
+    Without a usable header the entry expires default_ttl seconds from now,
+    which is immediately unless the caller knows the answer cannot change.
+    """
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return time.time() + default_ttl if default_ttl else 0.0
+
+
+class ESICache:
+    """ESI response cache: an in-memory LRU in front of an on-disk SQLite store
+
+    Rows that expired more than PRUNE_AFTER ago are deleted when the cache
+    is opened, so the file only holds entries still worth revalidating.
+    """
+
+    def __init__(self, path: str = ESI_CACHE_FILE, max_entries: int = MAX_MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self.memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS esi_cache ("
+            "key TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, expires REAL NOT NULL)"
+        )
+        self.db.execute("DELETE FROM esi_cache WHERE expires < ?", (time.time() - PRUNE_AFTER,))
+        self.db.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                return entry
+            row = self.db.execute(
+                "SELECT body, etag, expires FROM esi_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(json.loads(row[0]), row[1], row[2])
+            self._remember(key, entry)
+            return entry
+
+    def put(self, key: str, data: Any, etag: Optional[str], expires: float):
+        entry = CacheEntry(data, etag, expires)
+        with self.lock:
+            self._remember(key, entry)
+            self.db.execute(
+                "INSERT OR REPLACE INTO esi_cache (key, body, etag, expires) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(data), etag, expires),
+            )
+            self.db.commit()
+
+    def count(self, result: str):
+        """Count one lookup; result is "hit", "miss" or "revalidated" as in the metrics"""
+        with self.lock:
+            if result == "hit":
+                self.hits += 1
+            elif result == "miss":
+                self.misses += 1
+            else:
+                self.revalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "memory_entries": len(self.memory),
+            }
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
@@ -0,0 +1,371 @@
+import heapq
+import logging
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .csr import NUMPY_AVAILABLE, VECTORIZE_MIN_NODES, CSRGraph
+from .edges import SHIP_CLASSES, Edge, edge_weight
+
+logger = logging.getLogger(__name__)
+
+Connection = Tuple[int, int]
+
+
+class ChainGraph:
+    """Wormhole chain graph that is kept up to date from per-cycle deltas
+
+    The BFS tree rooted at the home system is cached, and the route to
+    high-sec is only recomputed when a system or connection change could
+    actually affect it. Per-ship-class weighted views of the chain are
+    built on first use and dropped whenever a connection, its attributes
+    or a system's security changes.
+
+    A second BFS, seeded from every high-sec system at once, keeps a
+    distance and next hop towards the nearest exit for every system in
+    the chain. New connections are folded into it incrementally; only
+    removing one of its tree edges or a security change rebuilds it.
+
+    Full rebuilds of either BFS on a large chain (VECTORIZE_MIN_NODES
+    systems or more, with NumPy installed) run over a CSR copy of the
+    adjacency with a vectorized frontier; smaller chains use the dicts.
+    """
+
+    def __init__(self, home_name: str, is_highsec: Callable[[Optional[int], str], bool]):
+        self.home_name = home_name
+        self.is_highsec = is_highsec
+        self.adjacency: Dict[int, Set[int]] = {}
+        self.connections: Set[Connection] = set()
+        # Attributes for each listed connection; missing ones default to a fresh hole of unknown size
+        self.edges: Dict[Connection, Edge] = {}
+        self.name_lookup: Dict[int, str] = {}
+        self.reverse_lookup: Dict[str, int] = {}
+        # Pathfinder map system ID -> EVE solar system ID
+        self.system_ids: Dict[int, Optional[int]] = {}
+        # Mapped systems that are high-sec, kept in step with the system table
+        self.highsec: Set[int] = set()
+        self.home_id: Optional[int] = None
+        # CSR copy of the adjacency for large rebuilds; patched with every link change
+        self.csr: Optional[CSRGraph] = None
+
+        # BFS state from the home system
+        self.parents: Dict[int, Optional[int]] = {}
+        self.distances: Dict[int, int] = {}
+        self.route: Optional[List[int]] = None
+        self.dirty = True
+
+        # Multi-source BFS from all high-sec systems: hops to the nearest exit and
+        # the neighbor to jump to next (None for the exits themselves)
+        self.exit_distances: Dict[int, int] = {}
+        self.exit_next_hop: Dict[int, Optional[int]] = {}
+        self.exits_dirty = True
+
+        # ship class -> node -> {neighbor: weight}, and the cached route for each class
+        self.views: Dict[str, Dict[int, Dict[int, int]]] = {}
+        self.ship_routes: Dict[str, Optional[List[int]]] = {}
+
+    def update_systems(self, systems: Iterable[Tuple[int, str, Optional[int]]]) -> bool:
+        """Replace the (map ID, name, EVE system ID) table; returns True if anything changed"""
+        systems = {sid: (name, system_id) for sid, name, system_id in systems}
+        previous = {sid: (name, self.system_ids.get(sid)) for sid, name in self.name_lookup.items()}
+        if systems == previous:
+            return False
+
+        self._clear_views()
+        if self.csr is not None:
+            self.csr.add_nodes(systems.keys() - previous.keys())
+        for sid in previous.keys() | systems.keys():
+            new = systems.get(sid)
+            if previous.get(sid) == new or (sid in self.highsec) == self._highsec_system(new):
+                continue
+            if sid in self.highsec:
+                self.highsec.discard(sid)
+            else:
+                self.highsec.add(sid)
+            self.exits_dirty = True
+            if sid in self.distances:
+                self.dirty = True
+
+        self.name_lookup = {sid: name for sid, (name, _) in systems.items()}
+        self.system_ids = {sid: system_id for sid, (_, system_id) in systems.items()}
+        self.reverse_lookup = {name: sid for sid, name in self.name_lookup.items()}
+
+        home_id = self.reverse_lookup.get(self.home_name)
+        if home_id != self.home_id:
+            self.home_id = home_id
+            self.dirty = True
+        return True
+
+    def apply_changes(self, added: Iterable[Connection], removed: Iterable[Connection]):
+        """Apply connection deltas, marking the route dirty only when it may change"""
+        added = list(added)
+        removed = list(removed)
+        if added or removed:
+            self._clear_views()
+        # Links that actually appeared in or left the adjacency, for patching the CSR copy
+        linked: List[Connection] = []
+        unlinked: List[Connection] = []
+
+        for source, target in removed:
+            if (source, target) not in self.connections:
+                continue
+            self.connections.discard((source, target))
+            self.edges.pop((source, target), None)
+            # Pathfinder may list the same link in both directions
+            if (target, source) in self.connections:
+                continue
+            self.adjacency.get(source, set()).discard(target)
+            self.adjacency.get(target, set()).discard(source)
+            if source != target:
+                unlinked.append((source, target))
+            if self.parents.get(target) == source or self.parents.get(source) == target:
+                self.dirty = True
+            if self.exit_next_hop.get(target) == source or self.exit_next_hop.get(source) == target:
+                self.exits_dirty = True
+
+        for source, target in added:
+            self.connections.add((source, target))
+            if source != target and target not in self.adjacency.get(source, ()):
+                linked.append((source, target))
+            self.adjacency.setdefault(source, set()).add(target)
+            self.adjacency.setdefault(target, set()).add(source)
+            if self._shortens_tree(source, target) or self._shortens_tree(target, source):
+                self.dirty = True
+            if not self.exits_dirty:
+                self._relax_exits(source, target)
+                self._relax_exits(target, source)
+
+        if self.csr is not None:
+            self.csr.remove_links(unlinked)
+            self.csr.add_links(linked)
+
+    def update_edges(self, edges: Iterable[Edge]) -> bool:
+        """Refresh connection attributes (EOL, mass, size); returns True if any changed"""
+        edges = {edge.key: edge for edge in edges}
+        if edges == self.edges:
+            return False
+        self.edges = edges
+        self._clear_views()
+        return True
+
+    def find_path_to_highsec(self) -> Optional[List[int]]:
+        """Return the system IDs from home to the nearest high-sec system"""
+        if self.dirty:
+            self._recompute()
+        return self.route
+
+    def exit_distance(self, sid: int) -> Optional[int]:
+        """Jumps from a mapped system to the nearest high-sec system, or None if cut off"""
+        if self.exits_dirty:
+            self._recompute_exits()
+        return self.exit_distances.get(sid)
+
+    def home_distances(self) -> Dict[int, int]:
+        """Jumps from home to every reachable system, from a fresh BFS
+
+        self.distances is only kept exact up to the current route length,
+        so anything reporting distances beyond the route reads these.
+        """
+        if self.home_id is None:
+            return {}
+        csr = self._csr()
+        if csr is not None:
+            return self._csr_bfs(csr, [self.home_id])[0]
+        distances = {self.home_id: 0}
+        queue = deque([self.home_id])
+        while queue:
+            current = queue.popleft()
+            for neighbor in self.adjacency.get(current, ()):
+                if neighbor not in distances:
+                    distances[neighbor] = distances[current] + 1
+                    queue.append(neighbor)
+        return distances
+
+    def exit_route(self, sid: int) -> Optional[List[int]]:
+        """System IDs from any mapped system to its nearest high-sec exit"""
+        if self.exits_dirty:
+            self._recompute_exits()
+        if sid not in self.exit_distances:
+            return None
+        path = [sid]
+        while self.exit_next_hop[path[-1]] is not None:
+            path.append(self.exit_next_hop[path[-1]])
+        return path
+
+    def ship_view(self, ship_class: str) -> Dict[int, Dict[int, int]]:
+        """Adjacency restricted to holes the ship class can take, with their weights"""
+        if ship_class not in self.views:
+            ship = SHIP_CLASSES[ship_class]
+            view: Dict[int, Dict[int, int]] = {}
+            for connection in self.connections:
+                edge = self.edges.get(connection) or Edge(*connection)
+                weight = edge_weight(edge, ship)
+                if weight is None:
+                    continue
+                source, target = connection
+                # The same link listed both ways keeps its cheaper direction
+                for a, b in ((source, target), (target, source)):
+                    neighbors = view.setdefault(a, {})
+                    if weight < neighbors.get(b, weight + 1):
+                        neighbors[b] = weight
+            self.views[ship_class] = view
+        return self.views[ship_class]
+
+    def find_ship_route(self, ship_class: str) -> Optional[List[int]]:
+        """Cheapest route from home to high-sec for a ship class, by Dijkstra over its view"""
+        if ship_class not in self.ship_routes:
+            self.ship_routes[ship_class] = self._dijkstra_to_highsec(self.ship_view(ship_class))
+        return self.ship_routes[ship_class]
+
+    def _highsec_system(self, system):
+        # system is a (name, EVE system ID) pair, or None if not mapped
+        return system is not None and self.is_highsec(system[1], system[0])
+
+    def _shortens_tree(self, source, target):
+        if source not in self.distances:
+            return False
+        new_distance = self.distances[source] + 1
+        if target in self.distances and self.distances[target] <= new_distance:
+            return False
+        # Reaching a system at or beyond the current route length cannot beat it
+        if self.route is not None and new_distance >= len(self.route) - 1:
+            return False
+        return True
+
+    def _clear_views(self):
+        self.views = {}
+        self.ship_routes = {}
+
+    def _dijkstra_to_highsec(self, view):
+        if self.home_id is None:
+            return None
+        # Costs are (weight, jumps) pairs so equal-weight routes prefer fewer jumps
+        best = {self.home_id: (0, 0)}
+        parents: Dict[int, Optional[int]] = {self.home_id: None}
+        heap = [(0, 0, self.home_id)]
+        while heap:
+            cost, jumps, current = heapq.heappop(heap)
+            if (cost, jumps) > best[current]:
+                continue
+            if current in self.highsec:
+                path = []
+                node: Optional[int] = current
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                path.reverse()
+                return path
+            for neighbor, weight in view.get(current, {}).items():
+                candidate = (cost + weight, jumps + 1)
+                if neighbor not in best or candidate < best[neighbor]:
+                    best[neighbor] = candidate
+                    parents[neighbor] = current
+                    heapq.heappush(heap, (candidate[0], candidate[1], neighbor))
+        return None
+
+    def _csr(self) -> Optional[CSRGraph]:
+        """The CSR copy if this chain is big enough to be worth one, building it on demand"""
+        if not NUMPY_AVAILABLE or len(self.adjacency) < VECTORIZE_MIN_NODES:
+            return None
+        if self.csr is None:
+            self.csr = CSRGraph(self.connections, self.name_lookup)
+        return self.csr
+
+    def _csr_bfs(self, csr: CSRGraph, sources: Iterable[int]):
+        """Run a BFS over the CSR copy; returns (distances, parents) dicts keyed by system ID"""
+        return self._csr_dicts(csr, *csr.bfs(csr.indices(sources)))
+
+    @staticmethod
+    def _csr_dicts(csr: CSRGraph, distances, parents):
+        # Reached nodes' BFS arrays as dicts keyed by system ID, as the incremental updates expect
+        reached = (distances >= 0).nonzero()[0]
+        sids = csr.ids[reached].tolist()
+        parent_indices = parents[reached]
+        parent_sids = csr.ids[parent_indices].tolist()
+        return (
+            dict(zip(sids, distances[reached].tolist())),
+            {
+                sid: parent if index >= 0 else None
+                for sid, parent, index in zip(sids, parent_sids, parent_indices.tolist())
+            },
+        )
+
+    def _recompute_exits(self):
+        self.exits_dirty = False
+        csr = self._csr()
+        if csr is not None:
+            self.exit_distances, self.exit_next_hop = self._csr_bfs(csr, self.highsec)
+            return
+        self.exit_distances = {sid: 0 for sid in self.highsec}
+        self.exit_next_hop = {sid: None for sid in self.highsec}
+        self._propagate_exits(deque(self.highsec))
+
+    def _relax_exits(self, source, target):
+        # A new link can only shorten distances, so push the improvement outwards from target
+        if source not in self.exit_distances:
+            return
+        distance = self.exit_distances[source] + 1
+        if distance < self.exit_distances.get(target, distance + 1):
+            self.exit_distances[target] = distance
+            self.exit_next_hop[target] = source
+            self._propagate_exits(deque([target]))
+
+    def _propagate_exits(self, queue):
+        distances = self.exit_distances
+        while queue:
+            current = queue.popleft()
+            distance = distances[current] + 1
+            for neighbor in self.adjacency.get(current, ()):
+                if distance < distances.get(neighbor, distance + 1):
+                    distances[neighbor] = distance
+                    self.exit_next_hop[neighbor] = current
+                    queue.append(neighbor)
+
+    def _recompute(self):
+        self.parents = {}
+        self.distances = {}
+        self.route = None
+        self.dirty = False
+        if self.home_id is None:
+            return
+
+        # Checked once so the per-node trace costs nothing when disabled
+        trace = logger.isEnabledFor(logging.DEBUG)
+        csr = self._csr()
+        if csr is not None:
+            distances, parents = csr.bfs(csr.indices([self.home_id]))
+            self.distances, self.parents = self._csr_dicts(csr, distances, parents)
+            if trace:
+                for sid, depth in sorted(self.distances.items(), key=lambda item: item[1]):
+                    logger.debug("🛰️ Visiting %s (ID: %s), depth: %d", self.name_lookup.get(sid, sid), sid, depth)
+            nearest = csr.nearest(distances, self.highsec)
+            if nearest is not None:
+                logger.debug("✅ High-sec system reached: %s", self.name_lookup.get(nearest))
+                self.route = self._unwind(nearest)
+            return
+
+        self.parents[self.home_id] = None
+        self.distances[self.home_id] = 0
+        queue = deque([self.home_id])
+        while queue:
+            current = queue.popleft()
+            if trace:
+                logger.debug(
+                    "🛰️ Visiting %s (ID: %s), depth: %d",
+                    self.name_lookup.get(current, current), current, self.distances[current],
+                )
+            if self.route is None and current in self.highsec:
+                logger.debug("✅ High-sec system reached: %s", self.name_lookup.get(current))
+                self.route = self._unwind(current)
+            for neighbor in self.adjacency.get(current, ()):
+                if neighbor not in self.distances:
+                    self.parents[neighbor] = current
+                    self.distances[neighbor] = self.distances[current] + 1
+                    queue.append(neighbor)
+
+    def _unwind(self, node):
+        path = []
+        while node is not None:
+            path.append(node)
+            node = self.parents[node]
+        path.reverse()
+        return path
@@ -0,0 +1,56 @@
+import hashlib
+import json
+from operator import itemgetter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .edges import Edge, parse_connection
+
+SystemRow = Tuple[int, str, Optional[int]]
+
+# Compact, C-accelerated encoding for fingerprints; edges encode as plain arrays
+_canonical_json = json.JSONEncoder(separators=(",", ":"), check_circular=False)
+
+
+class MapRecord(NamedTuple):
+    """The part of one mapData entry the monitors use"""
+
+    map_id: Optional[int]
+    systems: List[SystemRow]
+    connections: List[Edge]
+    # Digest of systems and connections; None when the record was built without one
+    fingerprint: Optional[str] = None
+
+
+def fingerprint_map(systems: List[SystemRow], connections: List[Edge]) -> str:
+    """Order-independent digest of everything the monitors read from one map
+
+    Two polls with the same fingerprint produce the same chain, so a
+    monitor can skip a cycle whose maps all match the previous ones.
+    """
+    canonical = (sorted(systems, key=itemgetter(0)), sorted(connections, key=itemgetter(0, 1)))
+    return hashlib.blake2b(_canonical_json.encode(canonical).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def extract_maps(data: Dict[str, Any]) -> List[MapRecord]:
+    """Compact records from an already decoded updateData payload"""
+    records = []
+    for map_data in data.get("mapData", []):
+        body = map_data.get("data", {})
+        systems = [(s["id"], s["name"], s.get("systemId")) for s in body.get("systems", [])]
+        connections = [parse_connection(c) for c in body.get("connections", [])]
+        records.append(
+            MapRecord(map_data.get("config", {}).get("id"), systems, connections, fingerprint_map(systems, connections))
+        )
+    return records
+
+
+def parse_update_data(raw: Union[bytes, str]) -> List[MapRecord]:
+    """Decode an updateData response into compact records
+
+    The whole response is decoded with json.loads, then only the fields
+    the monitors read are copied out; the decoded tree is dropped before
+    this returns, so only the records outlive the call. Decode time and
+    peak memory still follow the size of the response: pruning while
+    parsing was measured slower than this in pure Python and with ijson.
+    """
+    return extract_maps(json.loads(raw))
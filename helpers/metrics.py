@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from in-process graph work up to slow HTTP calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = [(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines for render(); called with the lock held"""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(k)} {v}" for k, v in self.values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self.values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[_label_key(labels)] = value
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(k)} {v}" for k, v in self.values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+        self.series: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            # [bucket counts..., sum, count]
+            series = self.series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        lines = []
+        for key, series in self.series.items():
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(bound)))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(name, help_text, **kwargs)
+            return self.metrics[name]
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+PATHFINDER_SECONDS = REGISTRY.histogram(
+    "wormwarden_pathfinder_request_seconds", "Latency of Pathfinder updateData requests"
+)
+PATHFINDER_ERRORS = REGISTRY.counter(
+    "wormwarden_pathfinder_errors_total", "Failed Pathfinder updateData requests"
+)
+ESI_SECONDS = REGISTRY.histogram("wormwarden_esi_request_seconds", "Latency of ESI requests that hit the network")
+ESI_ERRORS = REGISTRY.counter("wormwarden_esi_errors_total", "ESI requests that did not return 200 or 304")
+ESI_CACHE = REGISTRY.counter("wormwarden_esi_cache_total", "ESI cache lookups by result (hit, miss, revalidated)")
+DISCORD_SECONDS = REGISTRY.histogram("wormwarden_discord_request_seconds", "Latency of Discord webhook posts")
+DISCORD_ERRORS = REGISTRY.counter("wormwarden_discord_errors_total", "Failed or rate-limited Discord webhook posts")
+DISCORD_SENT = REGISTRY.counter("wormwarden_discord_messages_total", "Discord messages delivered")
+STAGE_SECONDS = REGISTRY.histogram("wormwarden_stage_seconds", "Time spent in each in-process cycle stage")
+GRAPH_SYSTEMS = REGISTRY.gauge("wormwarden_graph_systems", "Systems in the monitored chain")
+GRAPH_CONNECTIONS = REGISTRY.gauge("wormwarden_graph_connections", "Connections in the monitored chain")
+CYCLE_SECONDS = REGISTRY.histogram("wormwarden_cycle_seconds", "Duration of a full polling cycle")
+CYCLE_CHANGES = REGISTRY.counter("wormwarden_connection_changes_total", "Connections added or removed")
+HTTP_RETRIES = REGISTRY.counter("wormwarden_http_retries_total", "HTTP requests retried after a transient failure")
+CIRCUIT_OPEN = REGISTRY.gauge("wormwarden_circuit_open", "1 while the circuit breaker for a host is open")
+CYCLE_FAILURES = REGISTRY.counter("wormwarden_cycle_failures_total", "Polling cycles skipped after a network failure")
+ALERTS_SUPPRESSED = REGISTRY.counter(
+    "wormwarden_alerts_suppressed_total", "Alerts held back, by reason (flap, duplicate, reorder)"
+)
+UNCHANGED_CYCLES = REGISTRY.counter(
+    "wormwarden_unchanged_cycles_total", "Cycles skipped because the monitor's maps matched the previous poll"
+)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Suppress per-request logging"""
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("📈 Metrics available at http://%s:%d/metrics", host, port)
+    return server
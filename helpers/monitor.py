@@ -0,0 +1,380 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+import requests
+
+from .data import CONNECTIONS_FILE, LAST_PATH_FILE, log_alert
+from .dedup import (
+    DEFAULT_CONFIRM_CYCLES,
+    DEFAULT_CONFIRM_SECONDS,
+    DEFAULT_DEDUP_WINDOW,
+    AlertDeduplicator,
+    FlapSuppressor,
+    undirected,
+)
+from .edges import SHIP_CLASSES
+from .esi import get_route_length, resolve_system_name_to_id
+from .graph import ChainGraph
+from .mapdata import MapRecord
+from .metrics import (
+    ALERTS_SUPPRESSED,
+    CYCLE_CHANGES,
+    GRAPH_CONNECTIONS,
+    GRAPH_SYSTEMS,
+    STAGE_SECONDS,
+    UNCHANGED_CYCLES,
+)
+from .pathfinder import print_graph
+from .routing import find_trade_hub_routes
+from .snapshot import ChangeEvent, GraphSnapshot, build_snapshot
+from .state import STATE_DB_FILE, StateStore
+from .universe import StargateGraph
+
+logger = logging.getLogger(__name__)
+
+# Connection changes kept for the query API's /changes endpoint
+RECENT_CHANGES = 500
+
+
+class MapMonitor:
+    """Watches one (map, home system) pair and keeps its own state
+
+    Everything shared between monitors (HTTP sessions, ESI cache, static
+    universe data, the alert sink) is passed in, so each extra monitor only
+    costs its own chain graph and state files.
+    """
+
+    def __init__(
+        self,
+        home_name: str,
+        map_id: Optional[int],
+        state_dir: str,
+        is_highsec: Callable[[Optional[int], str], bool],
+        universe: Optional[StargateGraph],
+        trade_hubs: Dict[str, int],
+        send_alert: Callable[[str], None],
+        ship_classes: Sequence[str] = (),
+        confirm_cycles: int = DEFAULT_CONFIRM_CYCLES,
+        confirm_seconds: float = DEFAULT_CONFIRM_SECONDS,
+        dedup_window: float = DEFAULT_DEDUP_WINDOW,
+        data_version: str = "",
+    ):
+        self.home_name = home_name
+        self.map_id = map_id
+        self.label = f"map {map_id} / {home_name}" if map_id is not None else home_name
+        self.universe = universe
+        self.trade_hubs = trade_hubs
+        self.send_alert = send_alert
+        # The first class is the fleet's main hull and also drives the trade hub routes
+        self.ship_classes = list(ship_classes)
+
+        os.makedirs(state_dir, exist_ok=True)
+        self.state = StateStore(os.path.join(state_dir, STATE_DB_FILE))
+        self.state.migrate_json_state(
+            os.path.join(state_dir, CONNECTIONS_FILE),
+            os.path.join(state_dir, LAST_PATH_FILE),
+        )
+
+        self.prior_connections = self.state.load_connections()
+        # Until a first poll is stored, it only seeds state; alerting it would post the whole map
+        self.seeded = self.state.load_seeded()
+        # Connection alerts wait for a change to persist; every alert skips repeats
+        self.flaps = FlapSuppressor(self.prior_connections, confirm_cycles, confirm_seconds)
+        self.dedup = AlertDeduplicator(dedup_window)
+        self.last_path = self.state.load_last_path()
+        # Fingerprint of the maps and config the chain and stored state were last built from
+        self.fingerprint = self.state.load_fingerprint()
+        self.config_version = self._config_version(data_version)
+        self.stored_config_version = self.state.load_config_version()
+        if self.stored_config_version not in (None, self.config_version):
+            # The stored route was alerted under other settings or data; announce it afresh
+            self.last_path = []
+        self.hub_routes = None
+        self.alerted_hub_routes = None
+        self.ship_routes: Optional[Dict[str, Optional[List[str]]]] = None
+        self.alerted_ship_routes: Optional[Dict[str, Optional[List[str]]]] = None
+
+        # Latest read-only view of the chain; only built once the query API turns it on
+        self.publish_snapshots = False
+        self.snapshot: Optional[GraphSnapshot] = None
+        self.recent_changes: "deque[ChangeEvent]" = deque(maxlen=RECENT_CHANGES)
+
+        # The chain graph persists across cycles and is updated from deltas only;
+        # warm it from the stored snapshot so the first poll is just a diff
+        self.chain = ChainGraph(home_name, is_highsec)
+        self.chain.update_systems(self.state.load_systems())
+        self.chain.apply_changes(self.prior_connections, set())
+
+    def select_maps(self, maps: List[MapRecord]) -> List[MapRecord]:
+        """The maps this monitor watches; all of them if no map ID is set"""
+        return [record for record in maps if self.map_id is None or record.map_id == self.map_id]
+
+    @staticmethod
+    def maps_fingerprint(map_entries: List[MapRecord]) -> Optional[str]:
+        """One fingerprint for all the maps a monitor watches; None if any is missing one"""
+        if any(record.fingerprint is None for record in map_entries):
+            return None
+        if len(map_entries) == 1:
+            return map_entries[0].fingerprint
+        joined = ",".join(f"{record.map_id}:{record.fingerprint}" for record in map_entries)
+        return hashlib.blake2b(joined.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _config_version(self, data_version: str) -> str:
+        """Digest of everything besides the maps that decides routes and alerts"""
+        ships = [
+            (name, sorted(ship.sizes, key=str), ship.max_mass, ship.eol_allowed)
+            for name, ship in ((name, SHIP_CLASSES.get(name)) for name in self.ship_classes)
+            if ship is not None
+        ]
+        canonical = json.dumps([self.home_name, ships, sorted(self.trade_hubs.items()), data_version])
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+    def process(self, maps: List[MapRecord]) -> int:
+        """Run one cycle on the parsed updateData maps; returns the number of connection changes"""
+        map_entries = self.select_maps(maps)
+        chain = self.chain
+
+        # Same maps and config as last time: nothing to diff, route, alert on or save.
+        # The config is folded in so new settings or static data force a full cycle after a restart.
+        fingerprint = self.maps_fingerprint(map_entries)
+        if fingerprint is not None:
+            joined = f"{fingerprint}:{self.config_version}"
+            fingerprint = hashlib.blake2b(joined.encode("utf-8"), digest_size=16).hexdigest()
+        if (
+            fingerprint is not None
+            and fingerprint == self.fingerprint
+            and not (self.publish_snapshots and self.snapshot is None)
+        ):
+            UNCHANGED_CYCLES.inc(monitor=self.label)
+            logger.debug("💤 [%s] Maps unchanged since the last poll; cycle skipped", self.label)
+            if self.flaps.pending:
+                # Another poll with the same maps counts towards confirming pending changes
+                if self._alert_connection_changes(self.prior_connections, ()) and self.publish_snapshots:
+                    self._publish_snapshot(chain.find_path_to_highsec())
+            return 0
+
+        # Collect systems and connections
+        with STAGE_SECONDS.time(stage="extract"):
+            systems = [system for record in map_entries for system in record.systems]
+            edges = [edge for record in map_entries for edge in record.connections]
+            connections = {edge.key for edge in edges}
+
+        # Compare changes
+        with STAGE_SECONDS.time(stage="diff"):
+            added = connections - self.prior_connections
+            removed = self.prior_connections - connections
+
+        with STAGE_SECONDS.time(stage="graph_update"):
+            systems_changed = chain.update_systems(systems)
+            chain.apply_changes(added, removed)
+            edges_changed = chain.update_edges(edges)
+        name_lookup = chain.name_lookup
+        chain_changed = systems_changed or edges_changed or bool(added or removed)
+        GRAPH_SYSTEMS.set(len(name_lookup), monitor=self.label)
+        GRAPH_CONNECTIONS.set(len(connections), monitor=self.label)
+        CYCLE_CHANGES.inc(len(added) + len(removed), monitor=self.label)
+
+        # Show the full graph whenever it changed
+        if chain_changed:
+            print_graph(chain.adjacency, name_lookup)
+
+        # Pathfinding from home system to highsec
+        new_path = None
+        path = None
+        if chain.home_id is None:
+            logger.warning("⚠️ [%s] Could not find system ID for %s", self.label, self.home_name)
+        else:
+            with STAGE_SECONDS.time(stage="route_search"):
+                path = chain.find_path_to_highsec()
+                self.ship_routes = {
+                    ship_class: self._named(chain.find_ship_route(ship_class))
+                    for ship_class in self.ship_classes
+                }
+            if path:
+                new_path = self._report_path(path, chain_changed)
+
+        confirmed = 0
+        newly_seeded = not self.seeded
+        if self.seeded:
+            confirmed = self._alert_connection_changes(connections, added | removed)
+        else:
+            self.flaps.seed(connections)
+            self.seeded = True
+            logger.info(
+                "🌱 [%s] First poll for this state; took %d connections without alerting",
+                self.label,
+                len(connections),
+            )
+
+        if self.publish_snapshots and (chain_changed or confirmed or self.snapshot is None):
+            self._publish_snapshot(path)
+
+        # Only this cycle's deltas are written, in one transaction
+        with STAGE_SECONDS.time(stage="state_save"):
+            self.state.commit_cycle(
+                added,
+                removed,
+                systems=systems if systems_changed else None,
+                last_path=new_path,
+                fingerprint=fingerprint if fingerprint != self.fingerprint else None,
+                config_version=self.config_version if self.config_version != self.stored_config_version else None,
+                seeded=newly_seeded,
+            )
+        self.prior_connections = connections
+        self.fingerprint = fingerprint
+        self.stored_config_version = self.config_version
+        return len(added) + len(removed)
+
+    def _report_path(self, path, chain_changed):
+        """Alert if the route changed; returns the new named path, or None"""
+        chain = self.chain
+        name_lookup = chain.name_lookup
+        named_path = [name_lookup.get(s, str(s)) for s in path]
+
+        # One search over chain + stargates finds the best exit per hub
+        if self.universe and (chain_changed or self.hub_routes is None):
+            with STAGE_SECONDS.time(stage="hub_routing"):
+                self.hub_routes = self.report_trade_hub_routes()
+        routes_changed = (
+            self.alerted_hub_routes is not None and self.hub_routes != self.alerted_hub_routes
+        ) or (
+            self.alerted_ship_routes is not None and self.ship_routes != self.alerted_ship_routes
+        )
+
+        if named_path != self.last_path and not routes_changed and self._announced_path_holds(named_path):
+            # Same exit and length through other holes while the announced route still works
+            ALERTS_SUPPRESSED.inc(monitor=self.label, reason="reorder")
+            logger.debug("🔇 [%s] Equivalent route reordering; keeping the announced one", self.label)
+            self.alerted_hub_routes = self.hub_routes
+            self.alerted_ship_routes = self.ship_routes
+            return None
+
+        if named_path != self.last_path or routes_changed:
+            if self.hub_routes is not None:
+                distances = self.hub_routes
+            else:
+                try:
+                    entry_point_id = chain.system_ids.get(path[-1])
+                    if entry_point_id is None:
+                        entry_point_id = resolve_system_name_to_id(name_lookup.get(path[-1]))
+                    distances = self.report_trade_hub_distances(entry_point_id)
+                except requests.RequestException as e:
+                    # The route itself is still worth alerting on without hub distances
+                    logger.warning("⚠️ [%s] ESI unavailable; sending route without hub distances: %s", self.label, e)
+                    distances = {}
+            distances_msg = "\n".join(
+                [f"• {hub}: {summary}" for hub, summary in distances.items()]
+            )
+            ship_msg = "".join(
+                f"\n🚢 {ship_class}: " + (f"`{' → '.join(route)}`" if route else "no usable route")
+                for ship_class, route in self.ship_routes.items()
+            )
+            msg = (
+                f"🧭 Route from {named_path[0]} to High-Sec:\n`"
+                + " → ".join(named_path)
+                + "`"
+                + ship_msg
+                + "\n"
+                + distances_msg
+            )
+            if not self._alert(msg, key="route"):
+                # Not announced, so the stored route stays the one people last saw
+                return None
+            self.last_path = named_path
+            self.alerted_hub_routes = self.hub_routes
+            self.alerted_ship_routes = self.ship_routes
+            return named_path
+
+        logger.debug("🟢 [%s] High-sec path unchanged; no alert sent.", self.label)
+        self.alerted_hub_routes = self.hub_routes
+        self.alerted_ship_routes = self.ship_routes
+        return None
+
+    def _announced_path_holds(self, named_path):
+        """True if the last announced route is as short as named_path, to the same exit, and still linked"""
+        last = self.last_path
+        if len(last) != len(named_path) or last[0] != named_path[0] or last[-1] != named_path[-1]:
+            return False
+        ids = [self.chain.reverse_lookup.get(name) for name in last]
+        return all(
+            target in self.chain.adjacency.get(source, ()) for source, target in zip(ids, ids[1:])
+        )
+
+    def _alert(self, message: str, key: Optional[str] = None, state: Optional[str] = None) -> bool:
+        """Send and log an alert unless it repeats the last one sent for its key; returns True if sent
+
+        Without a key the message is its own key, so only an identical
+        message is a repeat. With one, the state (or the message) is
+        compared with the last state sent under that key.
+        """
+        if not self.dedup.should_send(key or message, state if state is not None else message):
+            ALERTS_SUPPRESSED.inc(monitor=self.label, reason="duplicate")
+            logger.debug("🔇 [%s] Duplicate alert suppressed: %s", self.label, message.splitlines()[0])
+            return False
+        self.send_alert(message)
+        log_alert(message)
+        return True
+
+    def _publish_snapshot(self, path):
+        version = self.snapshot.version + 1 if self.snapshot else 1
+        self.snapshot = build_snapshot(self.chain, self.label, version, self._named(path), tuple(self.recent_changes))
+
+    def _alert_connection_changes(self, connections, changed) -> int:
+        """Alert on the connection changes that have now persisted long enough; returns how many"""
+        added, removed = self.flaps.update(connections, changed)
+        if self.flaps.flaps:
+            ALERTS_SUPPRESSED.inc(self.flaps.flaps, monitor=self.label, reason="flap")
+        name_lookup = self.chain.name_lookup
+        now = time.time()
+        for kind, template, changes in (
+            ("added", "➕ New connection: `{}` → `{}`", added),
+            ("removed", "❌ Connection removed: `{}` → `{}`", removed),
+        ):
+            for source, target in changes:
+                source_name = name_lookup.get(source, "Unknown")
+                target_name = name_lookup.get(target, "Unknown")
+                # Keyed undirected, so the same link reported the other way round is still a repeat;
+                # only the same kind twice in a row is dropped, never a re-add after a removal
+                low, high = undirected((source, target))
+                self._alert(template.format(source_name, target_name), key=f"connection {low} {high}", state=kind)
+                self.recent_changes.append(ChangeEvent(now, kind, source_name, target_name))
+        return len(added) + len(removed)
+
+    def exit_route(self, system_name: str) -> Optional[List[str]]:
+        """Named route from any system in this chain to its nearest high-sec exit"""
+        sid = self.chain.reverse_lookup.get(system_name)
+        if sid is None:
+            return None
+        return self._named(self.chain.exit_route(sid))
+
+    def _named(self, path):
+        if path is None:
+            return None
+        return [self.chain.name_lookup.get(s, str(s)) for s in path]
+
+    def report_trade_hub_routes(self):
+        """Best route to each hub over the chain joined to the stargate graph"""
+        summaries = {}
+        ship_class = self.ship_classes[0] if self.ship_classes else None
+        routes = find_trade_hub_routes(self.chain, self.universe, self.trade_hubs, ship_class)
+        for hub_name, route in routes.items():
+            exit_name = self.universe.names.get(route.exit_id, str(route.exit_id))
+            summary = f"{route.wormhole_jumps} WH + {route.gate_jumps} gate jumps via {exit_name}"
+            logger.debug("📦 %s: %s", hub_name, summary)
+            summaries[hub_name] = summary
+        return summaries
+
+    def report_trade_hub_distances(self, highsec_entry_id):
+        """ESI fallback: gate jumps from a single high-sec exit to each hub"""
+        distances = {}
+        for hub_name, hub_id in self.trade_hubs.items():
+            jumps = get_route_length(highsec_entry_id, hub_id)
+            if jumps is not None:
+                logger.debug("📦 %s: %d jumps", hub_name, jumps)
+                distances[hub_name] = f"{jumps} jumps"
+        return distances
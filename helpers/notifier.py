@@ -0,0 +1,154 @@
+import atexit
+import logging
+import queue
+import random
+import threading
+import time
+from typing import List, Optional
+
+import requests
+
+from .metrics import DISCORD_ERRORS, DISCORD_SECONDS, DISCORD_SENT
+from .transport import Transport
+
+logger = logging.getLogger(__name__)
+
+# Discord rejects message content longer than this
+MAX_MESSAGE_LENGTH = 2000
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+REQUEST_TIMEOUT = 10
+CLOSE_TIMEOUT = 15
+
+
+def split_message(lines: List[str], limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Pack lines into as few messages as fit under Discord's length limit"""
+    chunks = []
+    current = ""
+    for line in lines:
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class DiscordNotifier:
+    """Sends Discord webhook messages from a background thread
+
+    Messages queued with send() during a polling cycle are held until
+    flush(), then posted as a single message so a busy cycle costs one
+    webhook call. The worker honors 429 Retry-After and the rate limit
+    bucket headers, retries failures with backoff, and drains on exit.
+    """
+
+    def __init__(self, webhook_url: Optional[str], session: Optional[requests.Session] = None):
+        self.webhook_url = webhook_url
+        # Retries stay here so Discord's own rate limit headers drive the backoff
+        self.transport = Transport(session, retries=0)
+        self.pending: List[str] = []
+        self.lock = threading.Lock()
+        self.queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.sent = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="discord-notifier", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def send(self, message: str):
+        """Hold a message until the end of the current cycle"""
+        with self.lock:
+            self.pending.append(message)
+
+    def flush(self):
+        """Hand everything held this cycle to the background sender"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        for chunk in split_message(pending):
+            self.queue.put(chunk)
+
+    def close(self, timeout: float = CLOSE_TIMEOUT):
+        """Flush, then wait for queued messages to be delivered"""
+        if not self.thread.is_alive():
+            return
+        self.flush()
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            message = self.queue.get()
+            if message is None:
+                return
+            self._deliver(message)
+
+    def _deliver(self, message):
+        if not self.webhook_url:
+            logger.warning("⚠️ DISCORD_WEBHOOK not set; alert not sent")
+            self.dropped += 1
+            return
+
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                with DISCORD_SECONDS.time():
+                    response = self.transport.post(
+                        self.webhook_url, json={"content": message}, timeout=REQUEST_TIMEOUT
+                    )
+            except requests.RequestException as e:
+                DISCORD_ERRORS.inc(reason="network")
+                logger.error("❌ Discord webhook error: %s", e)
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code >= 400:
+                DISCORD_ERRORS.inc(reason=str(response.status_code))
+            if response.status_code == 429:
+                delay = self._retry_after(response)
+                logger.warning("⏳ Discord rate limited; retrying in %.1fs", delay)
+                time.sleep(delay)
+                continue
+            if response.status_code >= 500:
+                logger.warning("⚠️ Discord returned %d, retrying...", response.status_code)
+                time.sleep(self._backoff(attempt))
+                continue
+            if response.status_code >= 400:
+                logger.error("❌ Discord rejected alert with %d: %s", response.status_code, response.text[:200])
+                self.dropped += 1
+                return
+
+            self.sent += 1
+            DISCORD_SENT.inc()
+            # Wait out an exhausted bucket before the next message
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                time.sleep(float(response.headers.get("X-RateLimit-Reset-After", 0)))
+            return
+
+        logger.error("❌ Giving up on Discord alert after %d attempts", MAX_ATTEMPTS)
+        self.dropped += 1
+
+    @staticmethod
+    def _backoff(attempt):
+        return BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    @staticmethod
+    def _retry_after(response):
+        value = response.headers.get("Retry-After")
+        if value is None:
+            try:
+                value = response.json().get("retry_after")
+            except ValueError:
+                value = None
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            return BACKOFF_BASE
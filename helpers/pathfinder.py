@@ -1,11 +1,20 @@
+import hashlib
+import logging
 import os
 import requests
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 
 from dotenv import load_dotenv
 
+from .mapdata import MapRecord, parse_update_data
+from .metrics import PATHFINDER_ERRORS, PATHFINDER_SECONDS
+from .scheduler import parse_retry_after
+from .transport import Transport
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Try to import the new auth system
 try:
     from .auth import EVEAuth, PathfinderAuth
@@ -13,10 +22,12 @@ try:
 except ImportError:
     AUTH_AVAILABLE = False
 
+# Statuses that mean Pathfinder rejected our credentials; only these warrant a token refresh
+AUTH_FAILURE_STATUSES = (401, 403)
+
 # Legacy headers for backward compatibility
 LEGACY_HEADERS = {
     "Accept": "application/json, text/javascript, */*; q=0.01",
-    "Accept-Encoding": "gzip, deflate, br, zstd",
     "Accept-Language": "en-US,en;q=0.9",
     "Cookie": (
         "cookie=1; "
@@ -33,10 +44,17 @@ class PathfinderClient:
     """Enhanced Pathfinder client with automatic authentication"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.transport = Transport()
+        self.session = self.transport.session
         self.eve_auth = None
         self.pf_auth = None
+        self.using_sso = False
+        # Seconds the server asked us to wait after the last request, if any
+        self.retry_after = None
         self.pathfinder_url = os.getenv("PATHFINDER_URL", "https://path.shadowflight.org")
+        # Digest of the last updateData body and the records decoded from it
+        self.last_digest: Optional[bytes] = None
+        self.last_maps: Optional[List[MapRecord]] = None
         
         # Initialize authentication if available
         if AUTH_AVAILABLE:
@@ -44,10 +62,13 @@ class PathfinderClient:
                 self.eve_auth = EVEAuth()
                 self.pf_auth = PathfinderAuth(self.eve_auth)
             except Exception as e:
-                print(f"⚠️ Could not initialize EVE auth: {e}")
+                logger.warning("⚠️ Could not initialize EVE auth: %s", e)
         
         # Set up headers
         self._setup_headers()
+        if self.using_sso:
+            # Keep the token fresh off the polling path
+            self.eve_auth.start_refresher()
     
     def _setup_headers(self):
         """Set up headers for requests"""
@@ -55,24 +76,24 @@ class PathfinderClient:
         pf_session = os.getenv('PF_SESSION')
         pf_char_cookie = os.getenv('PF_CHAR_COOKIE')
         
+        self.using_sso = False
         if pf_session and pf_char_cookie:
             # Use manual session cookies (most reliable)
             self.session.headers.update(LEGACY_HEADERS)
-            print("✅ Using manual session cookies")
+            logger.info("✅ Using manual session cookies")
             return
         
         # Try EVE SSO authentication (experimental)
         if self.pf_auth and self.pf_auth.authenticate_with_pathfinder():
             self.session.headers.update(self.pf_auth.get_session_headers())
-            print("⚠️ Using EVE SSO authentication (experimental)")
+            self.using_sso = True
+            logger.warning("⚠️ Using EVE SSO authentication (experimental)")
         else:
             # No authentication available
             self.session.headers.update(LEGACY_HEADERS)
-            print("❌ No authentication available")
-            print("💡 Please set up manual session cookies in your .env file:")
-            print("   PF_SESSION=your_session_cookie")
-            print("   PF_CHAR_COOKIE=your_char_cookie")
-            print("   PF_CHARACTER=your_character_id")
+            logger.error(
+                "❌ No authentication available; set PF_SESSION, PF_CHAR_COOKIE and PF_CHARACTER in your .env file"
+            )
     
     def _ensure_authenticated(self) -> bool:
         """Ensure we have valid authentication"""
@@ -91,55 +112,85 @@ class PathfinderClient:
     
     def get_map_data(self) -> Optional[Dict[str, Any]]:
         """Get map data from Pathfinder with automatic authentication"""
+        return self._fetch_update_data(lambda r: r.json())
+
+    def get_maps(self) -> Optional[List[MapRecord]]:
+        """Like get_map_data, but decoded straight into compact per-map records
+
+        A body identical to the previous one is not decoded again; the
+        records from last time are returned as they are.
+        """
+        return self._fetch_update_data(self._decode_maps)
+
+    def _decode_maps(self, response: requests.Response) -> List[MapRecord]:
+        digest = hashlib.blake2b(response.content, digest_size=16).digest()
+        if digest != self.last_digest or self.last_maps is None:
+            self.last_maps = parse_update_data(response.content)
+            self.last_digest = digest
+        return self.last_maps
+
+    def _fetch_update_data(self, decode: Callable[[requests.Response], Any]):
         if not self._ensure_authenticated():
-            print("❌ No valid authentication found")
-            print("Please run: python3 setup_auth.py")
+            logger.error("❌ No valid authentication found; run: python3 setup_auth.py")
             return None
         
-        url = f"{self.pathfinder_url}/api/Map/updateData"
-        headers = self.session.headers.copy()
-        headers["Content-Type"] = "application/x-www-form-urlencoded"
-        data = "getUserData=1"
+        self.retry_after = None
         
         try:
-            r = self.session.post(url, headers=headers, data=data)
-            r.raise_for_status()
-            return r.json()
+            return self._post_update_data(decode)
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching map data: {e}")
+            PATHFINDER_ERRORS.inc()
+            logger.error("❌ Error fetching map data: %s", e)
+            if not (self.using_sso and self._is_auth_failure(e)):
+                return None
             
-            # If using EVE auth, try refreshing tokens
-            if self.eve_auth and self.eve_auth.refresh_access_token():
-                print("🔄 Refreshed tokens, retrying...")
+            # Only an auth rejection is worth a token refresh; it is single-flight
+            # so a refresh already running in the background is reused
+            if self.eve_auth.refresh_access_token():
+                logger.info("🔄 Refreshed tokens, retrying...")
                 self._setup_headers()
                 try:
-                    r = self.session.post(url, headers=headers, data=data)
-                    r.raise_for_status()
-                    return r.json()
+                    return self._post_update_data(decode)
                 except requests.exceptions.RequestException as e2:
-                    print(f"❌ Retry failed: {e2}")
+                    PATHFINDER_ERRORS.inc()
+                    logger.error("❌ Retry failed: %s", e2)
             
             # If we're using EVE auth and it's failing, suggest manual cookies
-            if self.eve_auth and self.eve_auth.is_authenticated():
-                print("💡 EVE authentication is working, but Pathfinder is rejecting the request.")
-                print("💡 This might be because:")
-                print("   - Pathfinder doesn't support EVE SSO authentication")
-                print("   - You need to use manual session cookies instead")
-                print("💡 To use manual cookies, add to your .env file:")
-                print("   PF_SESSION=your_session_cookie")
-                print("   PF_CHAR_COOKIE=your_char_cookie")
-                print("   PF_CHARACTER=your_character_id")
+            if self.eve_auth.is_authenticated():
+                logger.warning(
+                    "💡 EVE authentication is working, but Pathfinder is rejecting the request. "
+                    "It may not support EVE SSO; set PF_SESSION, PF_CHAR_COOKIE and "
+                    "PF_CHARACTER in .env to use manual session cookies instead."
+                )
             
             return None
 
+    def _post_update_data(self, decode):
+        url = f"{self.pathfinder_url}/api/Map/updateData"
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        with PATHFINDER_SECONDS.time():
+            r = self.transport.post(url, headers=headers, data="getUserData=1")
+        self.retry_after = parse_retry_after(r.headers)
+        r.raise_for_status()
+        return decode(r)
+
+    @staticmethod
+    def _is_auth_failure(error: requests.exceptions.RequestException) -> bool:
+        response = getattr(error, "response", None)
+        return response is not None and response.status_code in AUTH_FAILURE_STATUSES
+
 def get_map_data():
     """Legacy function for backward compatibility"""
     client = PathfinderClient()
     return client.get_map_data()
 
 def print_graph(graph, system_name_lookup):
-    print("🌌 Pathfinder Wormhole Graph:")
+    """Dump the adjacency at DEBUG level; a no-op otherwise"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    lines = ["🌌 Pathfinder Wormhole Graph:"]
     for system_id, neighbors in graph.items():
         name = system_name_lookup.get(system_id, str(system_id))
         neighbor_names = [f"{system_name_lookup.get(n, str(n))} (id: {n})" for n in neighbors]
-        print(f"  {name} (id {system_id}) → {', '.join(neighbor_names)}")
\ No newline at end of file
+        lines.append(f"  {name} (id {system_id}) → {', '.join(neighbor_names)}")
+    logger.debug("\n".join(lines))
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from .monitor import MapMonitor
+from .snapshot import GraphSnapshot
+
+logger = logging.getLogger(__name__)
+
+Rendered = Tuple[int, bytes]
+
+# Distinct URLs whose rendered bodies are kept between snapshot changes
+MAX_RENDERED = 256
+
+
+class QueryServer:
+    """Serves the monitors' latest graph snapshots over HTTP, from memory only
+
+    Identical requests that arrive while one is being rendered wait on the
+    same render, and a rendered body is reused until a snapshot changes, so
+    a crowd of dashboards polling the same URL costs one render per cycle.
+    """
+
+    def __init__(self, monitors: List[MapMonitor]):
+        self.monitors: Dict[str, MapMonitor] = {monitor.label: monitor for monitor in monitors}
+        for monitor in monitors:
+            monitor.publish_snapshots = True
+        self.default = monitors[0].label if monitors else None
+        self.inflight: Dict[Tuple[str, tuple], "asyncio.Future[Rendered]"] = {}
+        self.rendered: Dict[str, Rendered] = {}
+        self.rendered_versions: tuple = ()
+        self.renders = 0
+
+        self.app = web.Application()
+        self.app.router.add_get("/monitors", self.handle)
+        self.app.router.add_get("/snapshot", self.handle)
+        self.app.router.add_get("/route", self.handle)
+        self.app.router.add_get("/exits", self.handle)
+        self.app.router.add_get("/changes", self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        target = request.path_qs
+        versions = tuple(m.snapshot.version if m.snapshot else 0 for m in self.monitors.values())
+        etag = '"' + "-".join(map(str, versions)) + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+
+        if versions != self.rendered_versions:
+            self.rendered = {}
+            self.rendered_versions = versions
+        cached = self.rendered.get(target)
+        if cached is not None:
+            status, body = cached
+        else:
+            key = (target, versions)
+            future = self.inflight.get(key)
+            if future is None:
+                future = asyncio.ensure_future(asyncio.to_thread(self._render, request.path, dict(request.query)))
+                self.inflight[key] = future
+                future.add_done_callback(lambda _: self.inflight.pop(key, None))
+            status, body = await asyncio.shield(future)
+            if status == 200 and versions == self.rendered_versions and len(self.rendered) < MAX_RENDERED:
+                self.rendered[target] = (status, body)
+
+        return web.Response(
+            status=status, body=body, content_type="application/json", headers={"ETag": etag} if status == 200 else None
+        )
+
+    def _render(self, path: str, query: Dict[str, str]) -> Rendered:
+        self.renders += 1
+        if path == "/monitors":
+            return self._json(200, [
+                {"monitor": label, "version": m.snapshot.version if m.snapshot else None}
+                for label, m in self.monitors.items()
+            ])
+
+        label = query.get("monitor", self.default)
+        monitor = self.monitors.get(label)
+        if monitor is None:
+            return self._json(404, {"error": f"unknown monitor {label}"})
+        snapshot: Optional[GraphSnapshot] = monitor.snapshot
+        if snapshot is None:
+            return self._json(503, {"error": "no map data yet"})
+
+        if path == "/snapshot":
+            return self._json(200, snapshot.to_dict())
+        if path == "/exits":
+            return self._json(200, [
+                {"id": sid, "name": name, "systemId": system_id, "jumpsFromHome": jumps}
+                for sid, name, system_id, jumps in snapshot.exits
+            ])
+        if path == "/changes":
+            try:
+                since = float(query.get("since", 0))
+            except ValueError:
+                return self._json(400, {"error": "since must be a unix timestamp"})
+            return self._json(200, [event._asdict() for event in snapshot.changes if event.timestamp > since])
+        if path == "/route":
+            origin = query.get("from")
+            if not origin:
+                return self._json(400, {"error": "missing from parameter"})
+            if origin not in snapshot.ids_by_name:
+                return self._json(404, {"error": f"{origin} is not in the chain"})
+            route = snapshot.route_from(origin)
+            return self._json(200, {"from": origin, "route": route, "jumps": len(route) - 1 if route else None})
+        return self._json(404, {"error": "not found"})
+
+    @staticmethod
+    def _json(status, payload) -> Rendered:
+        return status, json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+async def start_query_server(monitors: List[MapMonitor], port: int, host: str = "127.0.0.1") -> web.AppRunner:
+    """Serve the query API on the running event loop"""
+    server = QueryServer(monitors)
+    runner = web.AppRunner(server.app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("🛰️ Query API available at http://%s:%d", host, port)
+    return runner
@@ -0,0 +1,185 @@
+import gzip
+import json
+import logging
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .edges import Edge
+from .mapdata import MapRecord, fingerprint_map
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FILE = "polls.jsonl.gz"
+
+# Per map: systems by Pathfinder ID and edges by (source, target), both in map order
+MapState = Tuple[Dict[int, tuple], Dict[Tuple[int, int], Edge]]
+
+
+class ReplayFinished(Exception):
+    """Raised by ReplaySource once every recorded poll has been served"""
+
+
+def _expected_order(previous: dict, current: dict) -> List:
+    # The key order replaying the delta produces: survivors in place, newcomers appended
+    return [k for k in previous if k in current] + [k for k in current if k not in previous]
+
+
+def _map_delta(previous: MapState, current: MapState) -> dict:
+    old_systems, old_edges = previous
+    systems, edges = current
+    delta = {}
+    changed = [list(row) for sid, row in systems.items() if old_systems.get(sid) != row]
+    dropped = [sid for sid in old_systems if sid not in systems]
+    if changed:
+        delta["systems"] = changed
+    if dropped:
+        delta["removed_systems"] = dropped
+    if list(systems) != _expected_order(old_systems, systems):
+        delta["system_order"] = list(systems)
+
+    changed = [list(edge) for key, edge in edges.items() if old_edges.get(key) != edge]
+    dropped = [list(key) for key in old_edges if key not in edges]
+    if changed:
+        delta["edges"] = changed
+    if dropped:
+        delta["removed_edges"] = dropped
+    if list(edges) != _expected_order(old_edges, edges):
+        delta["edge_order"] = [list(key) for key in edges]
+    return delta
+
+
+def _apply_delta(state: MapState, delta: dict) -> MapState:
+    systems, edges = state
+    for sid in delta.get("removed_systems", ()):
+        systems.pop(sid, None)
+    for row in delta.get("systems", ()):
+        systems[row[0]] = tuple(row)
+    if "system_order" in delta:
+        systems = {sid: systems[sid] for sid in delta["system_order"]}
+
+    for key in delta.get("removed_edges", ()):
+        edges.pop(tuple(key), None)
+    for row in delta.get("edges", ()):
+        edge = Edge(*row)
+        edges[edge.key] = edge
+    if "edge_order" in delta:
+        edges = {tuple(key): edges[tuple(key)] for key in delta["edge_order"]}
+    return systems, edges
+
+
+def _state_of(record: MapRecord) -> MapState:
+    return {row[0]: tuple(row) for row in record.systems}, {edge.key: edge for edge in record.connections}
+
+
+class PollRecorder:
+    """Appends every poll to a gzip'd JSON-lines archive, as deltas
+
+    Each recorder starts with a keyframe holding the full maps; after that
+    a line only carries what changed since the previous poll, so a quiet
+    minute costs a few bytes. Lines are flushed as they are written and
+    every restart appends a new gzip member, so a crash loses at most the
+    poll in flight.
+    """
+
+    def __init__(self, path: str = ARCHIVE_FILE):
+        self.path = path
+        self.file = gzip.open(path, "at", encoding="utf-8")
+        self.maps: Optional[Dict[Optional[int], MapState]] = None
+        self.cycles = 0
+
+    def record(self, maps: Optional[List[MapRecord]], timestamp: Optional[float] = None):
+        entry = {"t": round(time.time() if timestamp is None else timestamp, 3)}
+        if maps is None:
+            entry["failed"] = True
+        else:
+            current = {record.map_id: _state_of(record) for record in maps}
+            if self.maps is None:
+                entry["keyframe"] = [
+                    [map_id, [list(row) for row in systems.values()], [list(edge) for edge in edges.values()]]
+                    for map_id, (systems, edges) in current.items()
+                ]
+            else:
+                empty = ({}, {})
+                deltas = [
+                    [map_id, delta]
+                    for map_id, state in current.items()
+                    if (delta := _map_delta(self.maps.get(map_id, empty), state))
+                ]
+                if deltas:
+                    entry["deltas"] = deltas
+                if list(current) != list(self.maps):
+                    entry["maps"] = list(current)
+            self.maps = current
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.file.flush()
+        self.cycles += 1
+
+    def close(self):
+        self.file.close()
+
+
+def _record(map_id, systems, edges) -> MapRecord:
+    systems, edges = list(systems.values()), list(edges.values())
+    return MapRecord(map_id, systems, edges, fingerprint_map(systems, edges))
+
+
+def read_archive(path: str) -> Iterator[Tuple[float, Optional[List[MapRecord]]]]:
+    """Yield (timestamp, maps) per recorded poll; maps is None for failed polls"""
+    maps: Dict[Optional[int], MapState] = {}
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn last line from a crash
+                    break
+                if entry.get("failed"):
+                    yield entry["t"], None
+                    continue
+                if "keyframe" in entry:
+                    maps = {
+                        map_id: _apply_delta(({}, {}), {"systems": systems, "edges": edges})
+                        for map_id, systems, edges in entry["keyframe"]
+                    }
+                else:
+                    for map_id, delta in entry.get("deltas", ()):
+                        maps[map_id] = _apply_delta(maps.get(map_id, ({}, {})), delta)
+                    if "maps" in entry:
+                        maps = {map_id: maps.get(map_id, ({}, {})) for map_id in entry["maps"]}
+                yield entry["t"], [_record(map_id, systems, edges) for map_id, (systems, edges) in maps.items()]
+    except EOFError:
+        logger.warning("⚠️ %s ends mid-write; replaying what was complete", path)
+
+
+class ReplaySource:
+    """Stands in for PathfinderClient and AdaptivePoller when replaying an archive
+
+    Polls come back in recorded order; the delay between them is the
+    recorded gap divided by speed, or nothing at all with speed 0.
+    """
+
+    retry_after = None
+
+    def __init__(self, path: str, speed: float = 0):
+        self.polls = read_archive(path)
+        self.speed = speed
+        self.cycles = 0
+        self.last_timestamp: Optional[float] = None
+        self.gap = 0.0
+
+    def get_maps(self) -> Optional[List[MapRecord]]:
+        try:
+            timestamp, maps = next(self.polls)
+        except StopIteration:
+            raise ReplayFinished(f"replayed {self.cycles} polls")
+        if self.last_timestamp is not None:
+            self.gap = max(0.0, timestamp - self.last_timestamp)
+        self.last_timestamp = timestamp
+        self.cycles += 1
+        return maps
+
+    def next_delay(self, changes: int = 0, retry_after: Optional[float] = None, failed: bool = False) -> float:
+        if not self.speed:
+            return 0.0
+        return self.gap / self.speed
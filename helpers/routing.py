@@ -0,0 +1,107 @@
+import heapq
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .graph import ChainGraph
+from .universe import StargateGraph
+
+# A wormhole jump costs the same as a high-sec gate jump
+WORMHOLE_JUMP_COST = 1
+
+
+class HubRoute(NamedTuple):
+    """Best route from the home system to one trade hub"""
+
+    hub: str
+    path: List[int]
+    exit_id: int
+    wormhole_jumps: int
+    gate_jumps: int
+    cost: int
+
+
+def find_trade_hub_routes(
+    chain: ChainGraph, universe: StargateGraph, hubs: Dict[str, int], ship_class: Optional[str] = None
+) -> Dict[str, HubRoute]:
+    """Route from home to every trade hub with one Dijkstra over chain + stargates
+
+    Chain systems are joined to the stargate graph by EVE system ID, so
+    every mapped k-space system is a candidate exit and the search picks
+    the cheapest one per hub instead of whichever exit is nearest to home.
+    With a ship class, only holes that class can take are used, at their
+    precomputed weights.
+    """
+    if chain.home_id is None:
+        return {}
+    home_id = _eve_id(chain, universe, chain.home_id)
+    if home_id is None:
+        return {}
+
+    if ship_class is None:
+        links = {source: dict.fromkeys(targets, WORMHOLE_JUMP_COST) for source, targets in chain.adjacency.items()}
+    else:
+        links = chain.ship_view(ship_class)
+
+    wormholes: Dict[int, List[Tuple[int, int]]] = {}
+    for source, targets in links.items():
+        source_id = _eve_id(chain, universe, source)
+        if source_id is None:
+            continue
+        for target, weight in targets.items():
+            target_id = _eve_id(chain, universe, target)
+            if target_id is not None:
+                wormholes.setdefault(source_id, []).append((target_id, weight))
+
+    targets = {hub_id: hub for hub, hub_id in hubs.items()}
+    # Costs are (cost, jumps) pairs; parents remember whether the last hop was a wormhole
+    best = {home_id: (0, 0)}
+    parents: Dict[int, Optional[tuple]] = {home_id: None}
+    heap = [(0, 0, home_id)]
+    routes: Dict[str, HubRoute] = {}
+
+    while heap and len(routes) < len(targets):
+        cost, jumps, current = heapq.heappop(heap)
+        if (cost, jumps) > best[current]:
+            continue
+        if current in targets:
+            routes[targets[current]] = _build_route(targets[current], current, cost, parents)
+
+        edges = [(n, weight, True) for n, weight in wormholes.get(current, [])]
+        edges += [(n, universe.jump_cost(n), False) for n in universe.gates.get(current, [])]
+        for neighbor, step_cost, via_wormhole in edges:
+            candidate = (cost + step_cost, jumps + 1)
+            if neighbor not in best or candidate < best[neighbor]:
+                best[neighbor] = candidate
+                parents[neighbor] = (current, via_wormhole)
+                heapq.heappush(heap, (candidate[0], candidate[1], neighbor))
+
+    return routes
+
+
+def _eve_id(chain, universe, sid):
+    system_id = chain.system_ids.get(sid)
+    if system_id is not None:
+        return system_id
+    return universe.ids_by_name.get(chain.name_lookup.get(sid))
+
+
+def _build_route(hub, node, cost, parents):
+    path = [node]
+    hops = []
+    while parents[node] is not None:
+        node, via_wormhole = parents[node]
+        path.append(node)
+        hops.append(via_wormhole)
+    path.reverse()
+    hops.reverse()
+
+    # The exit is where the last wormhole jump lands in k-space
+    wormhole_jumps = sum(hops)
+    last_wormhole = max((i for i, w in enumerate(hops) if w), default=-1)
+    return HubRoute(
+        hub=hub,
+        path=path,
+        exit_id=path[last_wormhole + 1],
+        wormhole_jumps=wormhole_jumps,
+        gate_jumps=len(hops) - wormhole_jumps,
+        cost=cost,
+    )
@@ -0,0 +1,63 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+DEFAULT_INTERVAL = 60
+DEFAULT_FLOOR = 15
+DEFAULT_CEILING = 300
+
+# Each idle cycle multiplies the interval by this much
+BACKOFF_FACTOR = 1.5
+# Weight of older cycles in the churn score
+CHURN_DECAY = 0.5
+JITTER = 0.1
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, in either of its two formats"""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptivePoller:
+    """Picks the delay before the next Pathfinder poll
+
+    Cycles that see connection churn pull the interval down towards the
+    floor; quiet or failing cycles back off exponentially towards the
+    ceiling. A server Retry-After always wins.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        floor: float = DEFAULT_FLOOR,
+        ceiling: float = DEFAULT_CEILING,
+    ):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.interval = min(max(interval, floor), ceiling)
+        self.churn = 0.0
+
+    def next_delay(self, changes: int = 0, retry_after: Optional[float] = None, failed: bool = False) -> float:
+        self.churn = self.churn * CHURN_DECAY + changes
+        if failed or self.churn < 1:
+            self.interval = min(self.ceiling, self.interval * BACKOFF_FACTOR)
+        else:
+            # More recent churn means a shorter interval, never below the floor
+            self.interval = max(self.floor, self.interval / (1 + self.churn))
+
+        delay = self.interval * random.uniform(1 - JITTER, 1 + JITTER)
+        delay = min(max(delay, self.floor), self.ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
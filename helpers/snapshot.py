@@ -0,0 +1,86 @@
+import time
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from .edges import Edge
+from .graph import ChainGraph
+
+
+class ChangeEvent(NamedTuple):
+    timestamp: float
+    kind: str
+    source: str
+    target: str
+
+
+class GraphSnapshot(NamedTuple):
+    """Read-only copy of one monitor's chain, safe to share with other threads
+
+    A new snapshot is built at the end of each cycle that changed the
+    chain; readers keep whichever one they grabbed.
+    """
+
+    monitor: str
+    version: int
+    updated: float
+    home: str
+    systems: Tuple[Tuple[int, str, Optional[int]], ...]
+    edges: Tuple[Edge, ...]
+    path: Optional[Tuple[str, ...]]
+    exits: Tuple[Tuple[int, str, Optional[int], Optional[int]], ...]
+    names: Mapping[int, str]
+    ids_by_name: Mapping[str, int]
+    exit_distances: Mapping[int, int]
+    exit_next_hop: Mapping[int, Optional[int]]
+    changes: Tuple[ChangeEvent, ...]
+
+    def route_from(self, system_name: str) -> Optional[List[str]]:
+        """Named route from a system to its nearest high-sec exit"""
+        sid = self.ids_by_name.get(system_name)
+        if sid not in self.exit_distances:
+            return None
+        path = [sid]
+        while self.exit_next_hop[path[-1]] is not None:
+            path.append(self.exit_next_hop[path[-1]])
+        return [self.names.get(s, str(s)) for s in path]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "monitor": self.monitor,
+            "version": self.version,
+            "updated": self.updated,
+            "home": self.home,
+            "systems": [{"id": sid, "name": name, "systemId": system_id} for sid, name, system_id in self.systems],
+            "connections": [edge._asdict() for edge in self.edges],
+            "path": list(self.path) if self.path else None,
+        }
+
+
+def build_snapshot(
+    chain: ChainGraph, label: str, version: int, path: Optional[List[str]], changes: Tuple[ChangeEvent, ...]
+) -> GraphSnapshot:
+    """Copy everything readers need out of the live chain"""
+    names = dict(chain.name_lookup)
+    # Touching the exit field brings it up to date before it is copied
+    chain.exit_distance(chain.home_id)
+    from_home = chain.home_distances()
+    exits = tuple(
+        (sid, names[sid], chain.system_ids.get(sid), from_home.get(sid))
+        for sid, distance in chain.exit_distances.items()
+        if distance == 0
+    )
+    return GraphSnapshot(
+        monitor=label,
+        version=version,
+        updated=time.time(),
+        home=chain.home_name,
+        systems=tuple((sid, name, chain.system_ids.get(sid)) for sid, name in names.items()),
+        edges=tuple(chain.edges.get(connection) or Edge(*connection) for connection in chain.connections),
+        path=tuple(path) if path else None,
+        exits=exits,
+        names=MappingProxyType(names),
+        ids_by_name=MappingProxyType({name: sid for sid, name in names.items()}),
+        exit_distances=MappingProxyType(dict(chain.exit_distances)),
+        exit_next_hop=MappingProxyType(dict(chain.exit_next_hop)),
+        changes=changes,
+    )
@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .data import load_last_path, load_prior_connections
+
+logger = logging.getLogger(__name__)
+
+STATE_DB_FILE = "state.sqlite3"
+
+SystemRecord = Tuple[str, Optional[int]]
+
+
+class StateStore:
+    """Crash-safe monitor state in SQLite (WAL mode)
+
+    Each cycle writes only what changed (added/removed connections, changed
+    systems, a new path) in a single transaction, so a crash leaves either
+    the previous or the new state and never a half-written file. The
+    stored systems and connections double as a graph snapshot to warm-load
+    the chain on startup.
+    """
+
+    def __init__(self, path: str = STATE_DB_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL stays consistent on power loss; at worst the last cycle is redone
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS connections ("
+                "source INTEGER NOT NULL, target INTEGER NOT NULL, "
+                "PRIMARY KEY (source, target)) WITHOUT ROWID"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS systems ("
+                "id INTEGER PRIMARY KEY, name TEXT NOT NULL, system_id INTEGER)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+        self.systems: Dict[int, SystemRecord] = {
+            sid: (name, system_id)
+            for sid, name, system_id in self.db.execute("SELECT id, name, system_id FROM systems")
+        }
+
+    def load_connections(self) -> Set[Tuple[int, int]]:
+        return set(self.db.execute("SELECT source, target FROM connections"))
+
+    def load_systems(self) -> List[Tuple[int, str, Optional[int]]]:
+        return [(sid, name, system_id) for sid, (name, system_id) in self.systems.items()]
+
+    def load_last_path(self) -> List[str]:
+        return json.loads(self._get_meta("last_path") or "[]")
+
+    def load_fingerprint(self) -> Optional[str]:
+        """Fingerprint of the maps the stored state was built from"""
+        return self._get_meta("fingerprint")
+
+    def load_seeded(self) -> bool:
+        """Whether a first poll has been taken in; state from before the flag counts if it holds connections"""
+        flag = self._get_meta("seeded")
+        if flag is not None:
+            return flag == "1"
+        return self.db.execute("SELECT 1 FROM connections LIMIT 1").fetchone() is not None
+
+    def load_config_version(self) -> Optional[str]:
+        """Version of the settings and static data the stored routes were alerted under"""
+        return self._get_meta("config_version")
+
+    def commit_cycle(
+        self,
+        added: Iterable[Tuple[int, int]] = (),
+        removed: Iterable[Tuple[int, int]] = (),
+        systems: Optional[Iterable[Tuple[int, str, Optional[int]]]] = None,
+        last_path: Optional[List[str]] = None,
+        fingerprint: Optional[str] = None,
+        config_version: Optional[str] = None,
+        seeded: bool = False,
+    ):
+        """Atomically apply one cycle's deltas; systems is the full table, diffed here"""
+        added = list(added)
+        removed = list(removed)
+        changed_systems = []
+        dropped_systems = []
+        if systems is not None:
+            current = {sid: (name, system_id) for sid, name, system_id in systems}
+            changed_systems = [
+                (sid, name, system_id)
+                for sid, (name, system_id) in current.items()
+                if self.systems.get(sid) != (name, system_id)
+            ]
+            dropped_systems = [(sid,) for sid in self.systems.keys() - current.keys()]
+
+        if not (
+            added or removed or changed_systems or dropped_systems
+            or last_path is not None or fingerprint or config_version or seeded
+        ):
+            return
+
+        with self.lock, self.db:
+            self.db.executemany("DELETE FROM connections WHERE source = ? AND target = ?", removed)
+            self.db.executemany("INSERT OR IGNORE INTO connections (source, target) VALUES (?, ?)", added)
+            self.db.executemany("DELETE FROM systems WHERE id = ?", dropped_systems)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO systems (id, name, system_id) VALUES (?, ?, ?)", changed_systems
+            )
+            if last_path is not None:
+                self._set_meta("last_path", json.dumps(last_path))
+            if fingerprint:
+                self._set_meta("fingerprint", fingerprint)
+            if config_version:
+                self._set_meta("config_version", config_version)
+            if seeded:
+                self._set_meta("seeded", "1")
+
+        for (sid,) in dropped_systems:
+            del self.systems[sid]
+        for sid, name, system_id in changed_systems:
+            self.systems[sid] = (name, system_id)
+
+    def migrate_json_state(self, connections_file: str, last_path_file: str):
+        """One-time import of the old connections.json / last_path.json files"""
+        if self._get_meta("migrated") is not None:
+            return
+        connections = load_prior_connections(connections_file)
+        last_path = load_last_path(last_path_file) if os.path.exists(last_path_file) else None
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO connections (source, target) VALUES (?, ?)", connections
+            )
+            if last_path is not None:
+                self._set_meta("last_path", json.dumps(last_path))
+            self._set_meta("migrated", "1")
+        if connections or last_path:
+            logger.info("📦 Imported %d connections from %s into %s", len(connections), connections_file, self.path)
+
+    def close(self):
+        self.db.close()
+
+    def _get_meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
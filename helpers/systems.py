@@ -0,0 +1,211 @@
+import logging
+import mmap
+import os
+import struct
+from typing import Iterable, NamedTuple, Optional
+
+from .universe import HIGHSEC_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_TABLE_FILE = "systems.bin"
+
+MAGIC = b"WWST"
+VERSION = 1
+
+# magic, version, row count, id slots, name slots
+HEADER = struct.Struct("<4sHIII")
+# system id, security, region id, constellation id, wormhole class, name length, name offset
+ROW = struct.Struct("<IfIIbxHI")
+SLOT = struct.Struct("<I")
+
+# Wormhole class by region ID; everything else is k-space (class 0)
+WORMHOLE_CLASS_RANGES = [
+    (11000001, 11000003, 1),
+    (11000004, 11000008, 2),
+    (11000009, 11000015, 3),
+    (11000016, 11000023, 4),
+    (11000024, 11000029, 5),
+    (11000030, 11000030, 6),
+    (11000031, 11000031, 12),  # Thera
+    (11000032, 11000032, 13),  # Shattered frigate holes
+    (11000033, 11000033, 14),  # Drifter systems
+    (10000070, 10000070, 25),  # Pochven
+]
+
+
+class SystemRow(NamedTuple):
+    system_id: int
+    name: str
+    security: float
+    region_id: int
+    constellation_id: int
+    wormhole_class: int
+
+
+def wormhole_class_for_region(region_id: int) -> int:
+    for low, high, wh_class in WORMHOLE_CLASS_RANGES:
+        if low <= region_id <= high:
+            return wh_class
+    return 0
+
+
+def _id_hash(system_id):
+    return (system_id * 2654435761) & 0xFFFFFFFF
+
+
+def _name_hash(name_bytes):
+    # 32-bit FNV-1a; stable across runs, unlike hash()
+    h = 0x811C9DC5
+    for byte in name_bytes:
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def _table_size(count):
+    # Power of two at least twice the row count keeps probe chains short
+    size = 1
+    while size < count * 2:
+        size <<= 1
+    return size
+
+
+def write_system_table(systems: Iterable[list], path: str = SYSTEM_TABLE_FILE):
+    """Write [system_id, name, security, constellation_id, region_id] rows as a system table"""
+    systems = sorted(systems)
+    id_slots = [0] * _table_size(len(systems))
+    name_slots = [0] * _table_size(len(systems))
+    rows = bytearray()
+    names = bytearray()
+
+    for index, (system_id, name, security, constellation_id, region_id) in enumerate(systems):
+        name_bytes = name.encode("utf-8")
+        rows += ROW.pack(
+            system_id,
+            security,
+            region_id,
+            constellation_id,
+            wormhole_class_for_region(region_id),
+            len(name_bytes),
+            len(names),
+        )
+        names += name_bytes
+        # Slots hold row index + 1 so that 0 means empty
+        for slots, h in ((id_slots, _id_hash(system_id)), (name_slots, _name_hash(name_bytes))):
+            mask = len(slots) - 1
+            slot = h & mask
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = index + 1
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(systems), len(id_slots), len(name_slots)))
+        f.write(rows)
+        f.write(struct.pack(f"<{len(id_slots)}I", *id_slots))
+        f.write(struct.pack(f"<{len(name_slots)}I", *name_slots))
+        f.write(names)
+    os.replace(tmp_path, path)
+
+
+class SystemTable:
+    """Memory-mapped, ID-keyed table of every solar system
+
+    Rows are fixed-width and both the ID and the name index are
+    open-addressed hash tables stored in the file, so lookups are O(1)
+    and opening the table does not parse anything.
+    """
+
+    def __init__(self, path: str = SYSTEM_TABLE_FILE):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.row_count, self._id_size, self._name_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} system table")
+        self._rows_offset = HEADER.size
+        self._id_offset = self._rows_offset + self.row_count * ROW.size
+        self._name_offset = self._id_offset + self._id_size * SLOT.size
+        self._names_offset = self._name_offset + self._name_size * SLOT.size
+
+    def __len__(self):
+        return self.row_count
+
+    def __contains__(self, system_id):
+        return self._find_id(system_id) is not None
+
+    def get(self, system_id: int) -> Optional[SystemRow]:
+        index = self._find_id(system_id)
+        if index is None:
+            return None
+        return self._row(index)
+
+    def id_for_name(self, name: str) -> Optional[int]:
+        name_bytes = name.encode("utf-8")
+        mask = self._name_size - 1
+        slot = _name_hash(name_bytes) & mask
+        while True:
+            index = self._slot(self._name_offset, slot)
+            if index is None:
+                return None
+            system_id, _, _, _, _, name_len, name_off = ROW.unpack_from(
+                self._mm, self._rows_offset + index * ROW.size
+            )
+            start = self._names_offset + name_off
+            if self._mm[start:start + name_len] == name_bytes:
+                return system_id
+            slot = (slot + 1) & mask
+
+    def name(self, system_id: int) -> Optional[str]:
+        row = self.get(system_id)
+        return row.name if row else None
+
+    def security(self, system_id: int) -> Optional[float]:
+        index = self._find_id(system_id)
+        if index is None:
+            return None
+        # Stored as float32, so round away the representation error
+        return round(ROW.unpack_from(self._mm, self._rows_offset + index * ROW.size)[1], 4)
+
+    def is_highsec(self, system_id: int) -> bool:
+        security = self.security(system_id)
+        return security is not None and security >= HIGHSEC_THRESHOLD
+
+    def _slot(self, table_offset, slot):
+        value = SLOT.unpack_from(self._mm, table_offset + slot * SLOT.size)[0]
+        return value - 1 if value else None
+
+    def _find_id(self, system_id):
+        if system_id is None:
+            return None
+        mask = self._id_size - 1
+        slot = _id_hash(system_id) & mask
+        while True:
+            index = self._slot(self._id_offset, slot)
+            if index is None:
+                return None
+            if SLOT.unpack_from(self._mm, self._rows_offset + index * ROW.size)[0] == system_id:
+                return index
+            slot = (slot + 1) & mask
+
+    def _row(self, index):
+        system_id, security, region_id, constellation_id, wh_class, name_len, name_off = ROW.unpack_from(
+            self._mm, self._rows_offset + index * ROW.size
+        )
+        start = self._names_offset + name_off
+        name = self._mm[start:start + name_len].decode("utf-8")
+        return SystemRow(system_id, name, round(security, 4), region_id, constellation_id, wh_class)
+
+
+def load_system_table(path: str = SYSTEM_TABLE_FILE) -> Optional[SystemTable]:
+    """Open the system table, or None if it has not been built yet"""
+    if not os.path.exists(path):
+        logger.warning("⚠️ %s not found; falling back to high-sec name list", path)
+        logger.info("💡 Build it with: python3 build_system_table.py")
+        return None
+    try:
+        table = SystemTable(path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning("⚠️ Could not open %s: %s", path, e)
+        return None
+    logger.info("🗂️ Mapped %d systems from %s", len(table), path)
+    return table
@@ -0,0 +1,184 @@
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+from .metrics import CIRCUIT_OPEN, HTTP_RETRIES
+from .scheduler import parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 20
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+# A Retry-After longer than this is handed back to the caller instead of slept on
+MAX_RETRY_WAIT = 10.0
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+POOL_SIZE = 10
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+# Only the encodings urllib3 can actually decode here (gzip, deflate, plus br/zstd if installed)
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"circuit open for {host}; retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Stops calling a host after repeated failures, then lets one probe through
+
+    After FAILURE_THRESHOLD consecutive failures the breaker opens and every
+    call fails fast for RESET_TIMEOUT seconds. The first call after that is
+    a trial: success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, host: str, threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.host = host
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info("✅ %s recovered; circuit closed", self.host)
+                CIRCUIT_OPEN.set(0, host=self.host)
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+                if self.opened_at is None:
+                    logger.warning("🔌 %s failed %d times; circuit open for %.0fs", self.host, self.failures, self.reset_timeout)
+                CIRCUIT_OPEN.set(1, host=self.host)
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(host: str) -> CircuitBreaker:
+    """The process-wide breaker for a host, shared by every Transport"""
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+class Transport:
+    """A pooled requests session with timeouts, retries and per-host circuit breakers
+
+    Connection errors, timeouts and RETRY_STATUSES are retried with full
+    jitter exponential backoff. Server errors and network failures count
+    against the host's breaker; once it opens, calls raise CircuitOpenError
+    (a requests.ConnectionError) right away instead of waiting on a dead host.
+    """
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+        retries: int = MAX_RETRIES,
+        pool_size: int = POOL_SIZE,
+    ):
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.retries = retries
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """Send a request, retrying transient failures; raises once retries run out"""
+        retries = self.retries if retries is None else retries
+        breaker = breaker_for(urlsplit(url).netloc)
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(breaker.host, breaker.retry_in())
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                breaker.record_failure()
+                if attempt == retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning("⚠️ %s %s failed (%s); retrying in %.1fs", method, breaker.host, e, delay)
+                HTTP_RETRIES.inc(host=breaker.host)
+                time.sleep(delay)
+                continue
+
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            delay = max(self._backoff(attempt), parse_retry_after(response.headers) or 0)
+            if delay > MAX_RETRY_WAIT:
+                return response
+            logger.warning("⚠️ %s %s returned %d; retrying in %.1fs", method, breaker.host, response.status_code, delay)
+            HTTP_RETRIES.inc(host=breaker.host)
+            response.close()
+            time.sleep(delay)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
@@ -0,0 +1,138 @@
+import heapq
+import json
+import logging
+import os
+from collections import deque
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+UNIVERSE_FILE = "universe.json"
+
+# Security status at or above this rounds to 0.5 and counts as high-sec
+HIGHSEC_THRESHOLD = 0.45
+
+# Cost of a jump the route flag wants to avoid; large enough that any
+# detour through preferred space wins, like ESI's own route planner
+AVOID_PENALTY = 50000
+
+ROUTE_FLAGS = ("shortest", "secure", "insecure")
+
+
+class StargateGraph:
+    """Offline k-space stargate graph built from a static universe dump"""
+
+    def __init__(self, systems: List[list], jumps: List[list]):
+        self.names: Dict[int, str] = {}
+        self.ids_by_name: Dict[str, int] = {}
+        self.security: Dict[int, float] = {}
+        self.constellations: Dict[int, int] = {}
+        self.regions: Dict[int, int] = {}
+        self.gates: Dict[int, List[int]] = {}
+        self._routes: Dict[tuple, Optional[List[int]]] = {}
+
+        for system_id, name, security, constellation_id, region_id in systems:
+            self.names[system_id] = name
+            self.ids_by_name[name] = system_id
+            self.security[system_id] = security
+            self.constellations[system_id] = constellation_id
+            self.regions[system_id] = region_id
+
+        for a, b in jumps:
+            self.gates.setdefault(a, []).append(b)
+            self.gates.setdefault(b, []).append(a)
+
+    @classmethod
+    def load(cls, path: str = UNIVERSE_FILE) -> "StargateGraph":
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(data["systems"], data["jumps"])
+
+    def is_highsec(self, system_id: int) -> bool:
+        return self.security.get(system_id, -1.0) >= HIGHSEC_THRESHOLD
+
+    def jump_cost(self, system_id: int, flag: str = "secure") -> int:
+        """Cost of jumping into a system under the given route flag"""
+        if flag == "secure" and not self.is_highsec(system_id):
+            return AVOID_PENALTY
+        if flag == "insecure" and self.is_highsec(system_id):
+            return AVOID_PENALTY
+        return 1
+
+    def route(self, origin_id: int, destination_id: int, flag: str = "secure") -> Optional[List[int]]:
+        """Return the system IDs along the route, origin and destination included"""
+        if flag not in ROUTE_FLAGS:
+            raise ValueError(f"Unknown route flag: {flag}")
+        if origin_id not in self.names or destination_id not in self.names:
+            return None
+
+        key = (origin_id, destination_id, flag)
+        if key not in self._routes:
+            if flag == "shortest":
+                self._routes[key] = self._bfs(origin_id, destination_id)
+            else:
+                self._routes[key] = self._dijkstra(origin_id, destination_id, flag)
+        return self._routes[key]
+
+    def route_length(self, origin_id: int, destination_id: int, flag: str = "secure") -> Optional[int]:
+        """Number of gate jumps between two systems, or None if unreachable"""
+        path = self.route(origin_id, destination_id, flag)
+        if path is None:
+            return None
+        return len(path) - 1
+
+    def _bfs(self, origin_id, destination_id):
+        parents = {origin_id: None}
+        queue = deque([origin_id])
+        while queue:
+            current = queue.popleft()
+            if current == destination_id:
+                return self._unwind(parents, destination_id)
+            for neighbor in self.gates.get(current, []):
+                if neighbor not in parents:
+                    parents[neighbor] = current
+                    queue.append(neighbor)
+        return None
+
+    def _dijkstra(self, origin_id, destination_id, flag):
+        # Costs are (penalty, jumps) pairs so equal-penalty routes prefer fewer jumps
+        best = {origin_id: (0, 0)}
+        parents = {origin_id: None}
+        heap = [(0, 0, origin_id)]
+        while heap:
+            cost, jumps, current = heapq.heappop(heap)
+            if current == destination_id:
+                return self._unwind(parents, destination_id)
+            if (cost, jumps) > best[current]:
+                continue
+            for neighbor in self.gates.get(current, []):
+                candidate = (cost + self.jump_cost(neighbor, flag), jumps + 1)
+                if neighbor not in best or candidate < best[neighbor]:
+                    best[neighbor] = candidate
+                    parents[neighbor] = current
+                    heapq.heappush(heap, (candidate[0], candidate[1], neighbor))
+        return None
+
+    @staticmethod
+    def _unwind(parents, node):
+        path = []
+        while node is not None:
+            path.append(node)
+            node = parents[node]
+        path.reverse()
+        return path
+
+
+def load_universe(path: str = UNIVERSE_FILE) -> Optional[StargateGraph]:
+    """Load the stargate graph, or None if no dump has been built yet"""
+    if not os.path.exists(path):
+        logger.warning("⚠️ %s not found; falling back to ESI for route lengths", path)
+        logger.info("💡 Build it with: python3 fetch_universe.py")
+        return None
+    try:
+        universe = StargateGraph.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("⚠️ Could not load %s: %s", path, e)
+        return None
+    logger.info("🌍 Loaded %d systems from %s", len(universe.names), path)
+    return universe
@@ -1,31 +1,64 @@
 from dotenv import load_dotenv
+import argparse
+import asyncio
+import logging
 import os
-import requests
+import tempfile
 import time
-import traceback
 import json
-from collections import defaultdict, deque
-
-from helpers.data import (
-    load_last_path,
-    load_prior_connections,
-    log_alert,
-    save_last_path,
-    save_prior_connections,
-)
-from helpers.esi import get_route_length, resolve_system_name_to_id
-from helpers.pathfinder import get_map_data, print_graph, PathfinderClient
+
+import requests
+
+from helpers.data import flush_alerts, set_alert_log_path
+from helpers.edges import SHIP_CLASSES
+from helpers.log import setup_logging
+from helpers.metrics import CYCLE_FAILURES, CYCLE_SECONDS, start_metrics_server
+from helpers.monitor import MapMonitor
+from helpers.notifier import DiscordNotifier
+from helpers.pathfinder import PathfinderClient
+from helpers.recorder import PollRecorder, ReplayFinished, ReplaySource
+from helpers.scheduler import AdaptivePoller
+from helpers.systems import SYSTEM_TABLE_FILE, load_system_table
+from helpers.universe import UNIVERSE_FILE, load_universe
 
 load_dotenv()
+setup_logging()
+
+logger = logging.getLogger("wormwarden")
 
 MAP_ID = os.getenv("MAP_ID")
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK")
 HOME_SYSTEM_NAME = "J103453"
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", 60))
+POLL_FLOOR = float(os.getenv("POLL_FLOOR", 15))
+POLL_CEILING = float(os.getenv("POLL_CEILING", 300))
+# A connection change must persist this many polls or seconds before it alerts
+ALERT_CONFIRM_CYCLES = int(os.getenv("ALERT_CONFIRM_CYCLES", 2))
+ALERT_CONFIRM_SECONDS = float(os.getenv("ALERT_CONFIRM_SECONDS", 180))
+# Identical alerts within this many seconds are sent once
+ALERT_DEDUP_WINDOW = float(os.getenv("ALERT_DEDUP_WINDOW", 3600))
 HIGHSEC_NAMES_FILE = "highsec_system_names.json"
+MONITORS_FILE = os.getenv("MONITORS_FILE", "monitors.json")
+METRICS_PORT = os.getenv("METRICS_PORT")
+QUERY_PORT = os.getenv("QUERY_PORT")
+QUERY_HOST = os.getenv("QUERY_HOST", "127.0.0.1")
+# Ship classes to find usable routes for, e.g. "battleship,frigate"; the first also drives hub routes
+FLEET_SHIP_CLASSES = [s.strip() for s in os.getenv("SHIP_CLASSES", "").split(",") if s.strip()]
+
+# Memory-mapped system table for ID-based security checks
+SYSTEMS = load_system_table()
+
+# Legacy name list, only needed until systems.bin has been built
+HIGHSEC_NAMES = set()
+if SYSTEMS is None:
+    with open(HIGHSEC_NAMES_FILE) as f:
+        HIGHSEC_NAMES = set(json.load(f))
 
-# Load highsec names
-with open(HIGHSEC_NAMES_FILE) as f:
-    HIGHSEC_NAMES = set(json.load(f))
+# Offline stargate graph; None means route lengths come from ESI
+UNIVERSE = load_universe()
+
+# Shared by every monitor; alerts from one cycle go out as one message
+notifier = DiscordNotifier(DISCORD_WEBHOOK_URL)
 
 TRADE_HUBS = {
     "Jita": 30000142,
@@ -37,148 +70,188 @@ TRADE_HUBS = {
 
 
 def send_discord_alert(message):
-    requests.post(DISCORD_WEBHOOK_URL, json={"content": message})
+    notifier.send(message)
 
 
-def find_path_to_highsec(graph, start_id, name_lookup):
-    visited = set()
-    queue = deque([(start_id, [start_id])])
+def is_highsec_system(system_id, name):
+    if SYSTEMS is None:
+        return name in HIGHSEC_NAMES
+    if system_id not in SYSTEMS:
+        system_id = SYSTEMS.id_for_name(name)
+    return system_id is not None and SYSTEMS.is_highsec(system_id)
 
-    while queue:
-        current, path = queue.popleft()
-        current_name = name_lookup.get(current, str(current))
-        print(
-            f"🛰️ Visiting {current_name} (ID: {current}), path: {[name_lookup.get(p, str(p)) for p in path]}"
-        )
-        if current in visited:
-            continue
-        visited.add(current)
 
-        if current_name in HIGHSEC_NAMES:
-            print(f"✅ High-sec system reached: {current_name}")
-            return path
+def data_version():
+    """Modification times of the static data files; rebuilding one forces a full cycle"""
+    stamps = []
+    for path in (SYSTEM_TABLE_FILE, UNIVERSE_FILE, HIGHSEC_NAMES_FILE):
+        try:
+            stamps.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        except OSError:
+            stamps.append(f"{path}:-")
+    return ",".join(stamps)
 
-        for neighbor in graph.get(current, []):
-            if neighbor not in visited:
-                queue.append((neighbor, path + [neighbor]))
-    return None
 
+def load_monitors(state_root=None, send_alert=send_discord_alert):
+    """Build one MapMonitor per (map, home) pair in MONITORS_FILE
 
-def report_trade_hub_distances(highsec_entry_id):
-    distances = {}
-    for hub_name, hub_id in TRADE_HUBS.items():
-        jumps = get_route_length(highsec_entry_id, hub_id)
-        if jumps is not None:
-            print(f"📦 {hub_name}: {jumps} jumps")
-            distances[hub_name] = jumps
-    return distances
+    Without a config file a single monitor watches HOME_SYSTEM_NAME across
+    every map and keeps its state in the working directory, as before.
+    A state_root puts every monitor's state under that directory instead.
+    """
+    if os.path.exists(MONITORS_FILE):
+        with open(MONITORS_FILE) as f:
+            pairs = json.load(f)
+    else:
+        pairs = [{"home": HOME_SYSTEM_NAME, "state_dir": "."}]
 
+    monitors = []
+    version = data_version()
+    for pair in pairs:
+        map_id = pair.get("map_id")
+        home = pair["home"]
+        state_dir = pair.get("state_dir") or os.path.join("state", f"{map_id}-{home}")
+        if state_root:
+            state_dir = os.path.join(state_root, f"{map_id}-{home}")
+        ship_classes = pair.get("ships", FLEET_SHIP_CLASSES)
+        unknown = [s for s in ship_classes if s not in SHIP_CLASSES]
+        if unknown:
+            raise ValueError(f"Unknown ship classes {unknown}; expected some of {sorted(SHIP_CLASSES)}")
+        monitors.append(
+            MapMonitor(
+                home,
+                map_id,
+                state_dir,
+                is_highsec=is_highsec_system,
+                universe=UNIVERSE,
+                trade_hubs=TRADE_HUBS,
+                send_alert=send_alert,
+                ship_classes=ship_classes,
+                confirm_cycles=ALERT_CONFIRM_CYCLES,
+                confirm_seconds=ALERT_CONFIRM_SECONDS,
+                dedup_window=ALERT_DEDUP_WINDOW,
+                data_version=version,
+            )
+        )
+        logger.info("👀 Watching %s", monitors[-1].label)
+    return monitors
 
-def main():
-    print("🚀 Pathfinder WH Alert Bot running...")
-    prior_connections = load_prior_connections()
-    
-    # Initialize Pathfinder client
-    pf_client = PathfinderClient()
+
+async def run(monitors, source=None, poller=None, recorder=None, send_alert=send_discord_alert):
+    # One Pathfinder poll feeds every monitor; they share the same session.
+    # A replay passes its archive reader as both the source and the poller.
+    pf_client = source or PathfinderClient()
+    poller = poller or AdaptivePoller(POLL_INTERVAL, POLL_FLOOR, POLL_CEILING)
+    if QUERY_PORT:
+        # Imported here so aiohttp is only needed when the API is enabled
+        from helpers.query_api import start_query_server
+
+        await start_query_server(monitors, int(QUERY_PORT), QUERY_HOST)
 
     while True:
         try:
-            data = pf_client.get_map_data()
-            
+            cycle_start = time.perf_counter()
+            maps = await asyncio.to_thread(pf_client.get_maps)
+            if recorder:
+                recorder.record(maps)
+
             # Handle case where Pathfinder authentication fails
-            if data is None:
-                print("❌ Could not fetch map data from Pathfinder")
-                print("💡 This might be due to:")
-                print("   - Pathfinder not supporting EVE SSO authentication")
-                print("   - Need to use manual session cookies")
-                print("   - Pathfinder server issues")
-                print("🔄 Retrying in 60 seconds...")
-                time.sleep(60)
+            if maps is None:
+                CYCLE_FAILURES.inc()
+                delay = poller.next_delay(retry_after=pf_client.retry_after, failed=True)
+                logger.error("❌ Could not fetch map data from Pathfinder; retrying in %.0f seconds", delay)
+                await asyncio.sleep(delay)
                 continue
-            
-            graph = defaultdict(list)
-
-            # Collect systems and connections
-            system_ids = [
-                (s["id"], s["name"])
-                for map_data in data.get("mapData", [])
-                for s in map_data["data"].get("systems", [])
-            ]
-            name_lookup = dict(system_ids)
-            reverse_lookup = {name: sid for sid, name in system_ids}
-
-            connections = {
-                (c["source"], c["target"])
-                for map_data in data.get("mapData", [])
-                for c in map_data["data"].get("connections", [])
-            }
-
-            for source, target in connections:
-                graph[source].append(target)
-                graph[target].append(source)
-
-            # Show the full graph
-            print_graph(graph, name_lookup)
-
-            # Pathfinding from home system to highsec
-            home_id = reverse_lookup.get(HOME_SYSTEM_NAME)
-            if not home_id:
-                print(f"⚠️ Could not find system ID for {HOME_SYSTEM_NAME}")
-            else:
-                path = find_path_to_highsec(graph, home_id, name_lookup)
-                if path:
-                    named_path = [name_lookup.get(s, str(s)) for s in path]
-                    last_path = load_last_path()
-
-                    if named_path != last_path:
-                        entry_point_id = resolve_system_name_to_id(
-                            name_lookup.get(path[-1])
-                        )
-                        msg = (
-                            f"🧭 Route from {named_path[0]} to High-Sec:\n`"
-                            + " → ".join(named_path)
-                            + "`"
-                        )
-                        distances = report_trade_hub_distances(entry_point_id)
-                        distances_msg = "\n".join(
-                            [
-                                f"• {hub}: {jumps} jumps"
-                                for hub, jumps in distances.items()
-                            ]
-                        )
-                        msg = (
-                            f"🧭 Route from {named_path[0]} to High-Sec:\n`"
-                            + " → ".join(named_path)
-                            + "`\n"
-                            + distances_msg
-                        )
-                        send_discord_alert(msg)
-                        log_alert(msg)
-                        save_last_path(named_path)
-                    else:
-                        print("🟢 High-sec path unchanged; no alert sent.")
-
-            # Compare changes
-            added = connections - prior_connections
-            removed = prior_connections - connections
-
-            for source, target in added:
-                alert = f"➕ New connection: `{name_lookup.get(source, 'Unknown')}` → `{name_lookup.get(target, 'Unknown')}`"
-                log_alert(alert)
-            for source, target in removed:
-                alert = f"❌ Connection removed: `{name_lookup.get(source, 'Unknown')}` → `{name_lookup.get(target, 'Unknown')}`"
-                log_alert(alert)
-
-            save_prior_connections(connections)
-            prior_connections = connections
-
-            time.sleep(60)
-        except Exception as e:
-            send_discord_alert("error - check app logs")
-            print(f"[ERROR] {e}")
-            print(traceback.format_exc())
+
+            changes = await asyncio.gather(
+                *(asyncio.to_thread(monitor.process, maps) for monitor in monitors)
+            )
+            notifier.flush()
+            flush_alerts()
+            elapsed = time.perf_counter() - cycle_start
+            CYCLE_SECONDS.observe(elapsed)
+
+            delay = poller.next_delay(sum(changes), pf_client.retry_after)
+            logger.info(
+                "🔁 Cycle done: %d changes across %d monitors in %.0f ms; next poll in %.0f seconds",
+                sum(changes),
+                len(monitors),
+                elapsed * 1000,
+                delay,
+                extra={"changes": sum(changes), "cycle_ms": round(elapsed * 1000, 1), "next_poll": round(delay, 1)},
+            )
+            await asyncio.sleep(delay)
+        except requests.RequestException as e:
+            # A flaky host costs this cycle only; breakers keep us from hammering it
+            CYCLE_FAILURES.inc()
+            delay = poller.next_delay(failed=True)
+            logger.warning("🌩️ Cycle skipped after network failure: %s; retrying in %.0f seconds", e, delay)
+            await asyncio.sleep(delay)
+        except ReplayFinished:
+            return
+        except Exception:
+            send_alert("error - check app logs")
+            notifier.flush()
+            logger.exception("❌ Polling cycle failed")
             exit(1)
 
 
+def replay(archive, speed, state_root=None):
+    """Feed a recorded archive through the monitors without touching live state
+
+    State and the alert log go to a scratch directory and alerts are only
+    logged, so a replay never reaches Discord or the production files.
+    """
+    state_root = state_root or tempfile.mkdtemp(prefix="wormwarden-replay-")
+    set_alert_log_path(os.path.join(state_root, "wh_alerts.log"))
+    alerts = []
+
+    def collect_alert(message):
+        alerts.append(message)
+        logger.info("🎬 Replayed alert: %s", message)
+
+    source = ReplaySource(archive, speed)
+    started = time.perf_counter()
+    asyncio.run(run(load_monitors(state_root, collect_alert), source, source, send_alert=collect_alert))
+    elapsed = time.perf_counter() - started
+    flush_alerts()
+    logger.info(
+        "🎬 Replayed %d polls in %.1f s (%.0f polls/s); %d alerts; state in %s",
+        source.cycles,
+        elapsed,
+        source.cycles / elapsed if elapsed else 0,
+        len(alerts),
+        state_root,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pathfinder wormhole chain alerts")
+    parser.add_argument("--record", metavar="ARCHIVE", help="append every poll to a compressed delta archive")
+    parser.add_argument("--replay", metavar="ARCHIVE", help="run a recorded archive through the pipeline and exit")
+    parser.add_argument(
+        "--speed", type=float, default=0, help="replay speed relative to the recording; 0 (default) means no waiting"
+    )
+    parser.add_argument("--replay-state", metavar="DIR", help="state directory for a replay (default: a temp dir)")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay(args.replay, args.speed, args.replay_state)
+        return
+
+    logger.info("🚀 Pathfinder WH Alert Bot running...")
+    if METRICS_PORT:
+        start_metrics_server(int(METRICS_PORT))
+    recorder = PollRecorder(args.record) if args.record else None
+    if recorder:
+        logger.info("📼 Recording polls to %s", args.record)
+    try:
+        asyncio.run(run(load_monitors(), recorder=recorder))
+    finally:
+        notifier.close()
+        if recorder:
+            recorder.close()
+
+
 if __name__ == "__main__":
     main()
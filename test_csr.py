@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from helpers.csr import CSRGraph  # noqa: E402
+
+
+def links_of(csr):
+    """Undirected links as system ID pairs, checking each neighbor slice is sorted"""
+    links = set()
+    for index, sid in enumerate(csr.ids.tolist()):
+        neighbors = csr.neighbors[csr.offsets[index] : csr.offsets[index + 1]]
+        assert (np.diff(neighbors) > 0).all()
+        links.update((min(sid, other), max(sid, other)) for other in csr.ids[neighbors].tolist())
+    return links
+
+
+def test_indices_skips_unknown_ids_in_any_position():
+    csr = CSRGraph([(10, 20)])
+    assert csr.indices([999, 20]).tolist() == [1]
+    assert csr.indices([20, 999, 5, 10]).tolist() == [1, 0]
+    assert csr.indices([15]).tolist() == []
+    assert csr.indices([]).tolist() == []
+    assert csr.mask([999, 20]).tolist() == [False, True]
+
+
+def test_nearest_prefers_reached_targets_then_lowest_id():
+    csr = CSRGraph([(1, 2), (2, 3), (1, 4), (5, 6)])
+    distances, _ = csr.bfs(csr.indices([1]))
+    assert csr.nearest(distances, [3, 4]) == 4
+    assert csr.nearest(distances, [2, 4, 999]) == 2
+    assert csr.nearest(distances, [5, 6]) is None
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_vectorized_bfs_matches_queue_bfs(seed):
+    rng = random.Random(seed)
+    links = {tuple(rng.sample(range(200), 2)) for _ in range(rng.randint(0, 300))}
+    csr = CSRGraph(links, range(200))
+    sources = csr.indices(rng.sample(range(200), rng.randint(1, 5)))
+    distances, parents = csr.bfs(sources, vectorized=True)
+    expected_distances, _ = csr.bfs(sources, vectorized=False)
+    assert distances.tolist() == expected_distances.tolist()
+    for node in (distances > 0).nonzero()[0]:
+        parent = parents[node]
+        assert distances[parent] == distances[node] - 1
+        assert node in csr.neighbors[csr.offsets[parent] : csr.offsets[parent + 1]]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_patches_match_a_fresh_build(seed):
+    rng = random.Random(seed)
+    links = {tuple(sorted(rng.sample(range(60), 2))) for _ in range(rng.randint(0, 40))}
+    csr = CSRGraph(links, range(rng.randint(0, 30)))
+    for _ in range(5):
+        removed = [link for link in links if rng.random() < 0.2]
+        added = {tuple(sorted(rng.sample(range(90), 2))) for _ in range(rng.randint(0, 8))} - links
+        csr.remove_links(removed)
+        csr.add_links(list(added))
+        csr.add_nodes(rng.sample(range(100), 3))
+        links = (links - set(removed)) | added
+        assert links_of(csr) == links_of(CSRGraph(links))
+        assert len(csr.offsets) == len(csr.ids) + 1 and csr.offsets[-1] == len(csr.neighbors)
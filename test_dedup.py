@@ -0,0 +1,148 @@
+import pytest
+
+from helpers.dedup import AlertDeduplicator, FlapSuppressor
+from helpers.edges import Edge
+from helpers.mapdata import MapRecord, fingerprint_map
+from helpers.monitor import MapMonitor
+
+# Pathfinder map ID -> (name, EVE system ID); the IDs keep route alerts off ESI
+SYSTEMS = {1: ("HOME", 31000001), 2: ("J2", 31000002), 3: ("J3", 31000003), 4: ("J4", 31000004),
+           5: ("HS3", 30000005), 6: ("HS4", 30000006)}
+
+
+def test_dedup_sends_add_remove_readd():
+    dedup = AlertDeduplicator(window=3600)
+    states = ["added", "added", "removed", "removed", "added"]
+    sent = [dedup.should_send("connection 2 4", state, now=i) for i, state in enumerate(states)]
+    assert sent == [True, False, True, False, True]
+
+
+def test_dedup_announces_a_route_that_changes_back():
+    dedup = AlertDeduplicator(window=3600)
+    sent = [dedup.should_send("route", route, now=i) for i, route in enumerate(["A", "B", "A", "A"])]
+    assert sent == [True, True, True, False]
+
+
+def test_dedup_forgets_after_window_and_beyond_capacity():
+    dedup = AlertDeduplicator(window=10, max_entries=2)
+    assert dedup.should_send("same message", now=0)
+    assert not dedup.should_send("same message", now=5)
+    assert dedup.should_send("same message", now=20)
+    dedup.should_send("b", now=21)
+    dedup.should_send("c", now=22)
+    assert dedup.should_send("same message", now=23)
+
+
+def test_flaps_are_held_back_and_direction_flips_ignored():
+    flaps = FlapSuppressor([(1, 2)], confirm_cycles=2, confirm_seconds=600)
+    # Reported the other way round: not a change
+    assert flaps.update({(2, 1)}, [(2, 1), (1, 2)], now=0) == ([], [])
+    # Blinks out for one poll and back
+    assert flaps.update(set(), [(2, 1)], now=60) == ([], [])
+    assert flaps.update({(2, 1)}, [(2, 1)], now=120) == ([], [])
+    assert flaps.flaps == 1
+    # Gone for two polls in a row; reported as it was announced
+    assert flaps.update(set(), [(2, 1)], now=180) == ([], [])
+    assert flaps.update(set(), (), now=240) == ([], [(1, 2)])
+
+
+def maps(connections):
+    systems = [(sid, name, system_id) for sid, (name, system_id) in SYSTEMS.items()]
+    edges = [Edge(source, target) for source, target in connections]
+    return [MapRecord(1, systems, edges, fingerprint_map(systems, edges))]
+
+
+def make_monitor(state_dir):
+    alerts = []
+    monitor = MapMonitor(
+        "HOME",
+        None,
+        state_dir,
+        is_highsec=lambda system_id, name: name.startswith("HS"),
+        universe=None,
+        trade_hubs={},
+        send_alert=alerts.append,
+        confirm_cycles=1,
+    )
+    monitor.alerts = alerts
+    return monitor
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    monkeypatch.setattr("helpers.monitor.log_alert", lambda message: None)
+    monitor = make_monitor(str(tmp_path))
+    yield monitor
+    monitor.state.close()
+
+
+def poll(monitor, connections):
+    monitor.alerts.clear()
+    monitor.process(maps(connections))
+    return [alert.splitlines()[0] for alert in monitor.alerts]
+
+
+def test_first_poll_seeds_connections_silently(monitor):
+    assert poll(monitor, [(1, 2), (2, 5), (3, 4)]) == ["🧭 Route from HOME to High-Sec:"]
+    assert poll(monitor, [(1, 2), (2, 5)]) == ["❌ Connection removed: `J3` → `J4`"]
+
+
+def test_empty_map_stays_seeded_after_restart(monitor, tmp_path):
+    poll(monitor, [])
+    monitor.state.close()
+    restarted = make_monitor(str(tmp_path))
+    try:
+        assert poll(restarted, [(1, 2)]) == ["➕ New connection: `HOME` → `J2`"]
+    finally:
+        restarted.state.close()
+
+
+def test_readded_connection_alerts_again(monitor):
+    base = [(1, 2), (2, 5)]
+    poll(monitor, base)
+    assert poll(monitor, base + [(2, 4)]) == ["➕ New connection: `J2` → `J4`"]
+    assert poll(monitor, base) == ["❌ Connection removed: `J2` → `J4`"]
+    assert poll(monitor, base + [(4, 2)]) == ["➕ New connection: `J4` → `J2`"]
+
+
+def test_route_that_changes_back_is_announced(monitor):
+    poll(monitor, [(1, 2), (2, 5)])
+    poll(monitor, [(1, 2), (2, 5), (1, 6)])
+    assert monitor.last_path == ["HOME", "HS4"]
+    poll(monitor, [(1, 2), (2, 5)])
+    assert monitor.alerts[0].splitlines()[1] == "`HOME → J2 → HS3`"
+    assert monitor.last_path == ["HOME", "J2", "HS3"]
+
+
+def test_equal_route_reordering_is_not_announced(monitor):
+    poll(monitor, [(1, 2), (2, 5)])
+    # An equally short route appears while the announced one still works
+    assert poll(monitor, [(1, 2), (2, 5), (1, 3), (3, 5)]) == [
+        "➕ New connection: `HOME` → `J3`",
+        "➕ New connection: `J3` → `HS3`",
+    ]
+    assert monitor.last_path == ["HOME", "J2", "HS3"]
+    # Once the announced one breaks, the other is announced
+    alerts = poll(monitor, [(1, 3), (3, 5)])
+    assert alerts[0] == "🧭 Route from HOME to High-Sec:"
+    assert monitor.last_path == ["HOME", "J3", "HS3"]
+
+
+def test_suppressed_route_alert_keeps_last_path(monitor):
+    poll(monitor, [(1, 2), (2, 5)])
+    monitor.dedup.should_send = lambda key, state=None, now=None: key != "route"
+    poll(monitor, [(1, 6)])
+    assert monitor.last_path == ["HOME", "J2", "HS3"]
+    assert monitor.state.load_last_path() == ["HOME", "J2", "HS3"]
+
+
+def test_changes_confirmed_on_a_skipped_cycle_reach_the_snapshot(monitor):
+    monitor.publish_snapshots = True
+    base = [(1, 2), (2, 5)]
+    poll(monitor, base)
+    monitor.flaps.confirm_cycles = 2
+    poll(monitor, base + [(3, 4)])
+    assert not monitor.snapshot.changes
+    # Same maps again: the cycle is skipped, but the change is now confirmed
+    assert poll(monitor, base + [(3, 4)]) == ["➕ New connection: `J3` → `J4`"]
+    assert [change.kind for change in monitor.snapshot.changes] == ["added"]
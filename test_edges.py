@@ -0,0 +1,49 @@
+import pytest
+
+from helpers.edges import SHIP_CLASSES, Edge, edge_weight, parse_connection
+
+FRIGATE = SHIP_CLASSES["frigate"]
+BATTLESHIP = SHIP_CLASSES["battleship"]
+CAPITAL = SHIP_CLASSES["capital"]
+
+
+@pytest.mark.parametrize(
+    "connection, expected",
+    [
+        ({"source": 1, "target": 2}, Edge(1, 2)),
+        ({"source": 1, "target": 2, "type": None}, Edge(1, 2)),
+        ({"source": 1, "target": 2, "type": ["wh_fresh", "wh_jump_mass_l"]}, Edge(1, 2, size="l")),
+        ({"source": 1, "target": 2, "type": ["wh_eol"]}, Edge(1, 2, eol=True)),
+        ({"source": 1, "target": 2, "eolUpdated": 1700000000}, Edge(1, 2, eol=True)),
+        ({"source": 1, "target": 2, "type": ["wh_reduced", "frigate"]}, Edge(1, 2, mass="reduced", size="s")),
+        # Critical wins over reduced when both are tagged
+        ({"source": 1, "target": 2, "type": ["wh_reduced", "wh_critical"]}, Edge(1, 2, mass="critical")),
+        # Unknown tags are ignored; the last size tag wins
+        (
+            {"source": 3, "target": 4, "type": ["wh_jump_mass_m", "preview", "wh_jump_mass_xl"]},
+            Edge(3, 4, size="xl"),
+        ),
+    ],
+)
+def test_parse_connection(connection, expected):
+    assert parse_connection(connection) == expected
+
+
+@pytest.mark.parametrize(
+    "edge, frigate, battleship, capital",
+    [
+        (Edge(1, 2), 1, 1, None),
+        (Edge(1, 2, size="s"), 1, None, None),
+        (Edge(1, 2, size="m"), 1, None, None),
+        (Edge(1, 2, size="l"), 1, 1, None),
+        (Edge(1, 2, size="xl"), 1, 1, 1),
+        (Edge(1, 2, eol=True, size="xl"), 6, 6, None),
+        (Edge(1, 2, mass="reduced", size="xl"), 2, 2, 2),
+        (Edge(1, 2, mass="critical", size="xl"), 11, None, None),
+        (Edge(1, 2, eol=True, mass="critical"), 16, None, None),
+    ],
+)
+def test_edge_weight_per_class(edge, frigate, battleship, capital):
+    assert edge_weight(edge, FRIGATE) == frigate
+    assert edge_weight(edge, BATTLESHIP) == battleship
+    assert edge_weight(edge, CAPITAL) == capital
@@ -0,0 +1,133 @@
+import random
+from collections import deque
+
+import pytest
+
+import helpers.graph
+from helpers.graph import ChainGraph
+
+HOME = "J100000"
+
+
+def is_highsec(system_id, name):
+    return name.startswith("HS")
+
+
+def random_systems(rng, count):
+    systems = [(sid, f"HS{sid}" if rng.random() < 0.1 else f"J{sid}", None) for sid in range(1, count)]
+    return [(0, HOME, None)] + systems
+
+
+def random_delta(rng, connections, count):
+    """Drop about a fifth of the links and add a few, some listed the other way round"""
+    new = {connection for connection in connections if rng.random() > 0.2}
+    for _ in range(rng.randint(0, 10)):
+        source, target = rng.sample(range(count), 2)
+        new.add((source, target))
+        if rng.random() < 0.1:
+            new.add((target, source))
+    return new
+
+
+def bfs(adjacency, sources):
+    distances = {sid: 0 for sid in sources}
+    queue = deque(sources)
+    while queue:
+        current = queue.popleft()
+        for neighbor in adjacency.get(current, ()):
+            if neighbor not in distances:
+                distances[neighbor] = distances[current] + 1
+                queue.append(neighbor)
+    return distances
+
+
+def rebuilt(systems, connections):
+    chain = ChainGraph(HOME, is_highsec)
+    chain.update_systems(systems)
+    chain.apply_changes(connections, set())
+    return chain
+
+
+def walk(chain, path):
+    """Check a route only uses existing links; returns its jump count"""
+    for source, target in zip(path, path[1:]):
+        assert target in chain.adjacency[source]
+    return len(path) - 1
+
+
+def run_deltas(seed, on_cycle):
+    rng = random.Random(seed)
+    count = rng.randint(5, 80)
+    systems = random_systems(rng, count)
+    chain = ChainGraph(HOME, is_highsec)
+    chain.update_systems(systems)
+    connections = set()
+    for _ in range(10):
+        new = random_delta(rng, connections, count)
+        chain.apply_changes(new - connections, connections - new)
+        connections = new
+        on_cycle(chain, systems, connections)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_incremental_route_matches_rebuild(seed):
+    def check(chain, systems, connections):
+        fresh = rebuilt(systems, connections)
+        path = chain.find_path_to_highsec()
+        expected = fresh.find_path_to_highsec()
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert path[0] == chain.home_id and path[-1] in chain.highsec
+            assert walk(chain, path) == len(expected) - 1
+
+    run_deltas(seed, check)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_exit_field_matches_per_node_bfs(seed):
+    def check(chain, systems, connections):
+        for sid, _, _ in systems:
+            # Distance to the nearest exit from every node, found the slow way
+            distances = bfs(chain.adjacency, [sid])
+            exits = [distances[exit_id] for exit_id in chain.highsec if exit_id in distances]
+            expected = min(exits) if exits else None
+            assert chain.exit_distance(sid) == expected
+            route = chain.exit_route(sid)
+            if expected is None:
+                assert route is None
+            else:
+                assert route[-1] in chain.highsec and walk(chain, route) == expected
+
+    run_deltas(seed, check)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_csr_rebuilds_match_dict_rebuilds(seed, monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(seed)
+    count = rng.randint(5, 80)
+    systems = random_systems(rng, count)
+    vectorized = ChainGraph(HOME, is_highsec)
+    plain = ChainGraph(HOME, is_highsec)
+    connections = set()
+    for _ in range(10):
+        new = random_delta(rng, connections, count + 10)
+        # New systems appear along with their links, and some vanish again
+        current = systems + [(sid, f"J{sid}", None) for sid in range(count, count + 10) if rng.random() < 0.5]
+        added, removed = new - connections, connections - new
+        connections = new
+        for chain, threshold in ((vectorized, 0), (plain, float("inf"))):
+            monkeypatch.setattr(helpers.graph, "VECTORIZE_MIN_NODES", threshold)
+            chain.update_systems(current)
+            chain.apply_changes(added, removed)
+            chain.dirty = chain.exits_dirty = True
+            chain.find_path_to_highsec()
+            chain.exit_distance(0)
+        assert vectorized.csr is not None and plain.csr is None
+        assert vectorized.distances == plain.distances
+        assert vectorized.exit_distances == plain.exit_distances
+        path = vectorized.find_path_to_highsec()
+        expected = plain.find_path_to_highsec()
+        assert (path is None) == (expected is None)
+        if path is not None:
+            assert walk(vectorized, path) == len(expected) - 1
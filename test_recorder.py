@@ -0,0 +1,88 @@
+import gzip
+import json
+
+from helpers.edges import Edge
+from helpers.mapdata import MapRecord, fingerprint_map
+from helpers.recorder import PollRecorder, read_archive
+
+
+def record(map_id, systems, connections):
+    systems = [tuple(row) for row in systems]
+    return MapRecord(map_id, systems, connections, fingerprint_map(systems, connections))
+
+
+def as_tuples(maps):
+    if maps is None:
+        return None
+    return [(m.map_id, list(m.systems), list(m.connections), m.fingerprint) for m in maps]
+
+
+SYSTEMS = [(1, "J103453", 31002238), (2, "J2", 31000002), (3, "Jita", 30000142)]
+EDGES = [Edge(1, 2), Edge(2, 3, eol=True, size="l")]
+
+POLLS = [
+    [record(1, SYSTEMS, EDGES)],
+    # Nothing changed
+    [record(1, SYSTEMS, EDGES)],
+    # A hole goes critical, a system is renamed, a link and a system appear
+    [record(1, [SYSTEMS[0], (2, "J2-renamed", 31000002), SYSTEMS[2], (4, "J4", 31000004)],
+            [EDGES[0], Edge(2, 3, eol=True, mass="critical", size="l"), Edge(3, 4)])],
+    None,
+    # Systems and links come back in a different order; a second map joins ahead of the first
+    [record(2, [(9, "Amarr", 30002187)], []),
+     record(1, [SYSTEMS[2], SYSTEMS[0], SYSTEMS[1]], [EDGES[1], EDGES[0]])],
+    # A map disappears and a system and a link are dropped
+    [record(1, SYSTEMS[:2], EDGES[:1])],
+]
+
+
+def lines(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_deltas_replay_to_the_recorded_polls(tmp_path):
+    path = str(tmp_path / "polls.jsonl.gz")
+    recorder = PollRecorder(path)
+    for t, maps in enumerate(POLLS):
+        recorder.record(maps, timestamp=t)
+    recorder.close()
+
+    replayed = list(read_archive(path))
+    assert [t for t, _ in replayed] == list(range(len(POLLS)))
+    assert [as_tuples(maps) for _, maps in replayed] == [as_tuples(maps) for maps in POLLS]
+
+    entries = lines(path)
+    assert "keyframe" in entries[0]
+    # An unchanged poll only carries its timestamp
+    assert entries[1] == {"t": 1}
+    assert entries[3] == {"t": 3, "failed": True}
+    assert entries[4]["maps"] == [2, 1]
+    assert "system_order" in entries[4]["deltas"][1][1]
+
+
+def test_restart_appends_a_keyframe(tmp_path):
+    path = str(tmp_path / "polls.jsonl.gz")
+    first = PollRecorder(path)
+    first.record(POLLS[0], timestamp=0)
+    first.record(POLLS[2], timestamp=1)
+    first.close()
+    second = PollRecorder(path)
+    second.record(POLLS[5], timestamp=2)
+    second.record(POLLS[4], timestamp=3)
+    second.close()
+
+    entries = lines(path)
+    assert ["keyframe" in entry for entry in entries] == [True, False, True, False]
+    replayed = [as_tuples(maps) for _, maps in read_archive(path)]
+    assert replayed == [as_tuples(POLLS[i]) for i in (0, 2, 5, 4)]
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / "polls.jsonl.gz")
+    recorder = PollRecorder(path)
+    recorder.record(POLLS[0], timestamp=0)
+    recorder.close()
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        f.write('{"t":1,"del')
+    assert [t for t, _ in read_archive(path)] == [0]
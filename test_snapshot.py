@@ -0,0 +1,33 @@
+from helpers.graph import ChainGraph
+from helpers.snapshot import build_snapshot
+
+SYSTEMS = [(1, "H", None), (2, "A", None), (3, "B", None), (4, "C", None), (5, "D", None),
+           (6, "HS1", None), (7, "HS2", None)]
+
+
+def is_highsec(system_id, name):
+    return name.startswith("HS")
+
+
+def exits(chain):
+    return sorted(build_snapshot(chain, "test", 1, None, ()).exits)
+
+
+def test_exit_jumps_follow_links_beyond_the_route():
+    chain = ChainGraph("H", is_highsec)
+    chain.update_systems(SYSTEMS)
+    chain.apply_changes({(1, 2), (2, 6), (2, 3), (3, 4), (4, 5), (5, 7)}, set())
+    assert chain.find_path_to_highsec() == [1, 2, 6]
+    assert exits(chain) == [(6, "HS1", None, 2), (7, "HS2", None, 5)]
+
+    # Cannot beat the 2-jump route, so the home BFS is left as it was
+    chain.apply_changes({(2, 7)}, set())
+    assert chain.find_path_to_highsec() == [1, 2, 6]
+    assert exits(chain) == [(6, "HS1", None, 2), (7, "HS2", None, 2)]
+
+
+def test_unreachable_exit_has_no_jumps():
+    chain = ChainGraph("H", is_highsec)
+    chain.update_systems(SYSTEMS)
+    chain.apply_changes({(1, 2), (2, 6), (5, 7)}, set())
+    assert exits(chain) == [(6, "HS1", None, 2), (7, "HS2", None, None)]
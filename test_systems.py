@@ -0,0 +1,114 @@
+import struct
+
+import pytest
+
+from helpers.systems import (
+    HEADER,
+    ROW,
+    SystemRow,
+    SystemTable,
+    _id_hash,
+    _name_hash,
+    _table_size,
+    load_system_table,
+    write_system_table,
+)
+
+# [system_id, name, security, constellation_id, region_id]
+SYSTEMS = [
+    [30000142, "Jita", 0.9459, 20000020, 10000002],
+    [30002187, "Amarr", 1.0, 20000322, 10000043],
+    [30002053, "Hek", 0.4525, 20000304, 10000042],
+    [30045349, "Ahbazon", 0.4499, 20000771, 10000020],
+    [31000005, "Thera", -1.0, 21000324, 11000031],
+    [31002238, "J103453", -1.0, 21000001, 11000004],
+    [30000001, "Tanoo", 0.8583, 20000001, 10000001],
+]
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = str(tmp_path / "systems.bin")
+    write_system_table(SYSTEMS, path)
+    table = SystemTable(path)
+    yield table
+    table._mm.close()
+
+
+def test_rows_round_trip(table):
+    assert len(table) == len(SYSTEMS)
+    assert table.get(30000142) == SystemRow(30000142, "Jita", 0.9459, 10000002, 20000020, 0)
+    assert table.get(31000005).wormhole_class == 12
+    assert table.get(31002238).wormhole_class == 2
+    for system_id, name, security, _, _ in SYSTEMS:
+        assert system_id in table
+        assert table.name(system_id) == name
+        assert table.security(system_id) == security
+        assert table.id_for_name(name) == system_id
+
+
+def test_file_layout(table, tmp_path):
+    data = (tmp_path / "systems.bin").read_bytes()
+    magic, version, rows, id_size, name_size = HEADER.unpack_from(data, 0)
+    assert (magic, version, rows) == (b"WWST", 1, len(SYSTEMS))
+    assert id_size == name_size == _table_size(len(SYSTEMS)) == 16
+    # Rows are written sorted by system ID, each with its name offset
+    first = ROW.unpack_from(data, HEADER.size)
+    assert first[0] == 30000001 and first[5:] == (len("Tanoo"), 0)
+    names_offset = HEADER.size + rows * ROW.size + (id_size + name_size) * 4
+    assert data[names_offset:names_offset + 5] == b"Tanoo"
+    assert len(data) == names_offset + sum(len(name) for _, name, _, _, _ in SYSTEMS)
+
+
+def test_highsec_boundary(table):
+    assert table.is_highsec(30000142)
+    assert table.is_highsec(30002053)
+    assert not table.is_highsec(30045349)
+    assert not table.is_highsec(31000005)
+    assert not table.is_highsec(99999999)
+
+
+def test_missing_lookups(table):
+    assert table.get(99999999) is None
+    assert table.get(None) is None
+    assert 99999999 not in table
+    assert table.name(99999999) is None
+    assert table.security(99999999) is None
+    assert table.id_for_name("Perimeter") is None
+
+
+def test_colliding_keys_are_probed(tmp_path):
+    # Four IDs and four names that all hash to the same slot of an 8-slot table
+    mask = _table_size(4) - 1
+    ids = [sid for sid in range(30000000, 30100000) if _id_hash(sid) & mask == 0][:4]
+    names = [name for name in (f"S{i}" for i in range(1000)) if _name_hash(name.encode()) & mask == 0][:4]
+    path = str(tmp_path / "systems.bin")
+    write_system_table([[sid, name, 0.5, 1, 1] for sid, name in zip(ids, names)], path)
+    table = SystemTable(path)
+    for sid, name in zip(ids, names):
+        assert table.get(sid).name == name
+        assert table.id_for_name(name) == sid
+    # A miss in a full chain stops at the first empty slot
+    missing = next(sid for sid in range(ids[-1] + 1, 30200000) if _id_hash(sid) & mask == 0)
+    assert table.get(missing) is None
+    table._mm.close()
+
+
+def test_empty_table(tmp_path):
+    path = str(tmp_path / "systems.bin")
+    write_system_table([], path)
+    table = SystemTable(path)
+    assert len(table) == 0
+    assert table.get(30000142) is None
+    assert table.id_for_name("Jita") is None
+    assert not table.is_highsec(30000142)
+    table._mm.close()
+
+
+def test_bad_files_are_not_loaded(tmp_path):
+    assert load_system_table(str(tmp_path / "missing.bin")) is None
+    path = tmp_path / "systems.bin"
+    path.write_bytes(HEADER.pack(b"NOPE", 1, 0, 1, 1) + struct.pack("<II", 0, 0))
+    with pytest.raises(ValueError):
+        SystemTable(str(path))
+    assert load_system_table(str(path)) is None
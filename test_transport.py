@@ -0,0 +1,130 @@
+import io
+
+import pytest
+import requests
+
+import helpers.transport
+from helpers.transport import CircuitBreaker, CircuitOpenError, Transport
+
+URL = "https://pf.example/api/map/updateData"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(helpers.transport.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(helpers.transport.time, "sleep", clock.sleep)
+    monkeypatch.setattr(helpers.transport, "_breakers", {})
+    return clock
+
+
+def response(status, headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.raw = io.BytesIO()
+    resp.headers.update(headers or {})
+    return resp
+
+
+def transport(outcomes, **kwargs):
+    """A Transport whose session hands out the given responses or raises the given errors"""
+    transport = Transport(**kwargs)
+    calls = []
+
+    def request(method, url, **_):
+        calls.append(url)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    transport.session.request = request
+    transport.calls = calls
+    return transport
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker("pf.example", threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    clock.now += 10
+    assert breaker.retry_in() == 20
+
+
+def test_breaker_lets_one_probe_through_then_closes(clock):
+    breaker = CircuitBreaker("pf.example", threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_breaker(clock):
+    breaker = CircuitBreaker("pf.example", threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.retry_in() == 30
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_open_breaker_fails_fast(clock):
+    failing = transport([requests.ConnectionError("refused")] * 5, retries=0)
+    for _ in range(5):
+        with pytest.raises(requests.ConnectionError):
+            failing.get(URL)
+    with pytest.raises(CircuitOpenError) as error:
+        failing.get(URL)
+    assert error.value.host == "pf.example" and error.value.retry_in == 30
+    assert len(failing.calls) == 5
+
+
+def test_short_retry_after_is_slept(clock):
+    client = transport([response(429, {"Retry-After": "3"}), response(200)])
+    assert client.get(URL).status_code == 200
+    assert len(client.calls) == 2
+    assert clock.slept == [3]
+
+
+def test_long_retry_after_is_handed_back(clock):
+    client = transport([response(429, {"Retry-After": "120"}), response(200)])
+    resp = client.get(URL)
+    assert resp.status_code == 429 and resp.headers["Retry-After"] == "120"
+    assert len(client.calls) == 1
+    assert clock.slept == []
+
+
+def test_last_retry_returns_the_error_response(clock):
+    client = transport([response(503), response(503)], retries=1)
+    assert client.get(URL).status_code == 503
+    assert len(client.calls) == 2
+    assert len(clock.slept) == 1
+
+
+def test_client_errors_do_not_count_against_breaker(clock):
+    client = transport([response(404)] * 6, retries=0)
+    for _ in range(6):
+        assert client.get(URL).status_code == 404
+    assert helpers.transport.breaker_for("pf.example").state == "closed"